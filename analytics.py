@@ -0,0 +1,189 @@
+"""Analytics over the lapses in the history.
+
+Everything works on a `LapseStore`. NumPy is used when installed; otherwise
+the same results are computed in pure Python.
+
+"""
+
+import datetime as dt
+import itertools
+from collections.abc import Sequence
+
+from timer import LapseStore, LapseType
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover  NumPy is optional.
+    np = None
+
+_SECOND = 1_000_000  # In epoch microseconds.
+_HOUR = 3600
+_DAY = 24 * _HOUR
+_EPOCH_DATE = dt.date(1970, 1, 1)
+_EPOCH_WEEKDAY = _EPOCH_DATE.weekday()
+
+
+def _columns(store: LapseStore, type: LapseType | None):
+    """`(starts, durations)` in seconds, as NumPy arrays."""
+    starts = np.frombuffer(store.starts, dtype=np.int64)
+    ends = np.frombuffer(store.ends, dtype=np.int64)
+    if type is not None:
+        mask = np.frombuffer(store.types, dtype=np.uint8) == store.type_code(type)
+        starts, ends = starts[mask], ends[mask]
+
+    return starts // _SECOND, (ends - starts) // _SECOND
+
+
+def _rows(store: LapseStore, type: LapseType | None):
+    """Yield `(start, duration)` in seconds."""
+    for start, end, lapse_type in store.rows():
+        if type is None or lapse_type == type:
+            yield start // _SECOND, (end - start) // _SECOND
+
+
+def _histogram(
+    store: LapseStore, type: LapseType | None, utc_offset: int, period: int, size: int
+) -> list[int]:
+    if np is not None:
+        starts, durations = _columns(store, type)
+        slots = (starts + utc_offset) // period % size
+        return (
+            np.bincount(slots, weights=durations, minlength=size)
+            .astype(np.int64)
+            .tolist()
+        )
+
+    totals = [0] * size
+    for start, duration in _rows(store, type):
+        totals[(start + utc_offset) // period % size] += duration
+    return totals
+
+
+def hourly_histogram(
+    store: LapseStore, type: LapseType | None = LapseType.focus, utc_offset: int = 0
+) -> list[int]:
+    """Seconds per hour of the day, by the hour each lapse started.
+
+    :param utc_offset: Seconds to add to UTC to get the local time.
+
+    """
+    return _histogram(store, type, utc_offset, _HOUR, 24)
+
+
+def weekday_histogram(
+    store: LapseStore, type: LapseType | None = LapseType.focus, utc_offset: int = 0
+) -> list[int]:
+    """Seconds per weekday, Monday first, by the day each lapse started."""
+    totals = _histogram(store, type, utc_offset, _DAY, 7)
+    # Slot 0 is the weekday of the epoch.
+    return [totals[(weekday - _EPOCH_WEEKDAY) % 7] for weekday in range(7)]
+
+
+def daily_totals(
+    store: LapseStore, type: LapseType | None = LapseType.focus, utc_offset: int = 0
+) -> tuple[list[dt.date], list[int]]:
+    """:return: The days with lapses, sorted, and the seconds in each one."""
+    if np is not None:
+        starts, durations = _columns(store, type)
+        days, inverse = np.unique((starts + utc_offset) // _DAY, return_inverse=True)
+        seconds = np.bincount(inverse, weights=durations, minlength=len(days))
+        day_numbers, totals = days.tolist(), seconds.astype(np.int64).tolist()
+    else:
+        per_day: dict[int, int] = {}
+        for start, duration in _rows(store, type):
+            day = (start + utc_offset) // _DAY
+            per_day[day] = per_day.get(day, 0) + duration
+        day_numbers = sorted(per_day)
+        totals = [per_day[day] for day in day_numbers]
+
+    return [_EPOCH_DATE + dt.timedelta(days=day) for day in day_numbers], totals
+
+
+def streaks(
+    store: LapseStore,
+    min_seconds: int = 1,
+    type: LapseType | None = LapseType.focus,
+    utc_offset: int = 0,
+) -> list[tuple[dt.date, int]]:
+    """Runs of consecutive days with at least `min_seconds` each.
+
+    :return: The first day and the length in days of every streak.
+
+    """
+    days, totals = daily_totals(store, type, utc_offset)
+    active = [
+        (day - _EPOCH_DATE).days
+        for day, total in zip(days, totals, strict=True)
+        if total >= min_seconds
+    ]
+    if not active:
+        return []
+
+    if np is not None:
+        day_numbers = np.array(active, dtype=np.int64)
+        starts = np.flatnonzero(np.diff(day_numbers, prepend=day_numbers[0] - 2) != 1)
+        lengths = np.diff(starts, append=len(day_numbers))
+        return [
+            (_EPOCH_DATE + dt.timedelta(days=int(day_numbers[start])), int(length))
+            for start, length in zip(starts, lengths, strict=True)
+        ]
+
+    result = []
+    run_start, length = active[0], 1
+    for previous, day in itertools.pairwise(active):
+        if day == previous + 1:
+            length += 1
+        else:
+            result.append((_EPOCH_DATE + dt.timedelta(days=run_start), length))
+            run_start, length = day, 1
+    result.append((_EPOCH_DATE + dt.timedelta(days=run_start), length))
+    return result
+
+
+def rolling_mean(values: Sequence[int], window: int) -> list[float]:
+    """Mean of every `window` consecutive values."""
+    if window <= 0:
+        raise ValueError("The window must be positive.")  # noqa: TRY003  Bad argument.
+    if len(values) < window:
+        return []
+
+    if np is not None:
+        sums = np.cumsum(np.asarray(values, dtype=np.float64))
+        sums[window:] = sums[window:] - sums[:-window]
+        return (sums[window - 1 :] / window).tolist()
+
+    total = sum(values[:window])
+    means = [total / window]
+    for old, new in zip(values, values[window:], strict=False):
+        total += new - old
+        means.append(total / window)
+    return means
+
+
+def average_lapse_seconds(
+    store: LapseStore, type: LapseType | None = LapseType.focus
+) -> float:
+    """Average length of a lapse. Zero if there are none."""
+    if np is not None:
+        _, durations = _columns(store, type)
+        return float(durations.mean()) if len(durations) else 0.0
+
+    count = total = 0
+    for _, duration in _rows(store, type):
+        count += 1
+        total += duration
+    return total / count if count else 0.0
+
+
+def _total_seconds(store: LapseStore, type: LapseType) -> int:
+    if np is not None:
+        return int(_columns(store, type)[1].sum())
+    return store.get_seconds(type)
+
+
+def focus_rest_ratio(store: LapseStore) -> float | None:
+    """Focused seconds per rested second. `None` if there was no rest."""
+    rested = _total_seconds(store, LapseType.rest)
+    if not rested:
+        return None
+    return _total_seconds(store, LapseType.focus) / rested
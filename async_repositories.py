@@ -0,0 +1,106 @@
+"""Awaitable counterparts of the repositories, for the UI event loop.
+
+Each call runs the blocking repository method on a database thread, inside a
+`UnitOfWork` of its own, so awaiting it doesn't stall the loop.
+
+`Focus` doesn't write through these: its changes go through its writer, so
+they're ordered and batched with the rest. See `BackgroundWriter.call`.
+
+"""
+
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+from db import UnitOfWork
+from domain import Goal, Skill, Stat
+from repositories import (
+    BaseRepository,
+    GoalsRepository,
+    GoalUpdate,
+    SkillRepository,
+    SkillUpdate,
+    StatsRepository,
+    StatUpdate,
+)
+
+# A single thread: SQLite takes one writer at a time anyway.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="focus-db")
+
+
+async def run_on_database_thread[T](call: Callable[[], T]) -> T:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, call)
+
+
+async def run_in_unit_of_work[T](call: Callable[[], T]) -> T:
+    """Run `call` on the database thread, inside a `UnitOfWork`."""
+
+    def run() -> T:
+        with UnitOfWork():
+            return call()
+
+    return await run_on_database_thread(run)
+
+
+class _AsyncRepository[R: BaseRepository]:
+    _repository_class: type[R]
+
+    async def _run[T](self, call: Callable[[R], T]) -> T:
+        return await run_in_unit_of_work(lambda: call(self._repository_class()))
+
+
+class AsyncSkillRepository(_AsyncRepository[SkillRepository]):
+    _repository_class = SkillRepository
+
+    async def create_skill(self, skill: Skill) -> Skill:
+        return await self._run(lambda repository: repository.create_skill(skill))
+
+    async def get_skill_by_name(self, name: str) -> Skill | None:
+        return await self._run(lambda repository: repository.get_skill_by_name(name))
+
+    async def get_skill_by_id(self, id: int) -> Skill | None:
+        return await self._run(lambda repository: repository.get_skill_by_id(id))
+
+    async def get_all_skills(self) -> list[Skill]:
+        return await self._run(lambda repository: list(repository.get_all_skills()))
+
+    async def update_skill(self, *, update: SkillUpdate) -> Skill:
+        return await self._run(
+            lambda repository: repository.update_skill(update=update)
+        )
+
+    async def store_skill(self, snapshot: SkillUpdate):
+        await self._run(lambda repository: repository.store_skill(snapshot))
+
+
+class AsyncStatsRepository(_AsyncRepository[StatsRepository]):
+    _repository_class = StatsRepository
+
+    async def create_stat(self, stat: Stat) -> Stat:
+        return await self._run(lambda repository: repository.create_stat(stat))
+
+    async def get_stat_by_name(self, name: str) -> Stat | None:
+        return await self._run(lambda repository: repository.get_stat_by_name(name))
+
+    async def get_all_stats(self) -> list[Stat]:
+        return await self._run(lambda repository: list(repository.get_all_stats()))
+
+    async def update_stat(self, *, update: StatUpdate) -> Stat:
+        return await self._run(lambda repository: repository.update_stat(update=update))
+
+
+class AsyncGoalsRepository(_AsyncRepository[GoalsRepository]):
+    _repository_class = GoalsRepository
+
+    async def create_goal(self, goal: Goal) -> Goal:
+        return await self._run(lambda repository: repository.create_goal(goal))
+
+    async def get_goal_by_id(self, id: int) -> Goal:
+        return await self._run(lambda repository: repository.get_goal_by_id(id))
+
+    async def get_all_goals(self) -> list[Goal]:
+        return await self._run(lambda repository: list(repository.get_all_goals()))
+
+    async def update_goal(self, update: GoalUpdate) -> Goal:
+        return await self._run(lambda repository: repository.update_goal(update))
@@ -0,0 +1,317 @@
+"""Benchmarks.
+
+Run one with `python bench.py <name>`; `python bench.py --help` lists them.
+
+"""
+
+import argparse
+import random
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+
+_BENCHMARKS: dict[str, Callable[[argparse.Namespace], None]] = {}
+
+
+def benchmark(function: Callable[[argparse.Namespace], None]):
+    _BENCHMARKS[function.__name__.removeprefix("bench_")] = function
+    return function
+
+
+@contextmanager
+def timed(label: str) -> Iterator[None]:
+    start = time.perf_counter()
+    yield
+    print(f"{label}: {time.perf_counter() - start:.3f}s")  # noqa: T201
+
+
+def _generate_lapses(count: int):
+    """A `LapseStore` with `count` lapses, one every ten minutes."""
+    from timer import LapseStore, LapseType
+
+    rng = random.Random(0)  # noqa: S311  Not for security.
+    types = list(LapseType)
+    store = LapseStore()
+    start = 1_700_000_000 * 1_000_000
+    for _ in range(count):
+        duration = rng.randrange(60, 1500) * 1_000_000
+        store.append_row(start, start + duration, rng.choice(types))
+        start += 600 * 1_000_000
+    return store
+
+
+@benchmark
+def bench_analytics(args: argparse.Namespace):
+    """Hourly histogram: naive loop over `Lapse` objects vs `analytics`."""
+    import analytics
+    from timer import LapseType
+
+    with timed(f"generate {args.count} lapses"):
+        store = _generate_lapses(args.count)
+
+    with timed("naive loop"):
+        naive = [0] * 24
+        for lapse in store:
+            if lapse.type == LapseType.focus:
+                naive[lapse.start.hour] += lapse.get_seconds()
+
+    numpy = analytics.np
+    analytics.np = None
+    try:
+        with timed("analytics, pure Python"):
+            pure = analytics.hourly_histogram(store)
+    finally:
+        analytics.np = numpy
+
+    if numpy is not None:
+        with timed("analytics, NumPy"):
+            vectorized = analytics.hourly_histogram(store)
+        assert vectorized == naive  # noqa: S101
+
+    assert pure == naive  # noqa: S101
+
+
+@benchmark
+def bench_levels(args: argparse.Namespace):
+    """Large xp grants: level by level vs `levels`."""
+    from levels import NEXT_LEVEL_REQUIRED_XP_FACTOR, LevelCurve
+
+    xp_amounts = [10**exponent for exponent in range(2, 40)] * 1000
+
+    with timed(f"level by level, {len(xp_amounts)} grants"):
+        for xp in xp_amounts:
+            xp_to_next_level = 100
+            while xp >= xp_to_next_level:
+                xp -= xp_to_next_level
+                xp_to_next_level = int(xp_to_next_level * NEXT_LEVEL_REQUIRED_XP_FACTOR)
+
+    curve = LevelCurve(100)
+    with timed(f"levels, {len(xp_amounts)} grants"):
+        for xp in xp_amounts:
+            curve.gain(xp)
+
+
+@contextmanager
+def _temporary_database(profile: str | None = None) -> Iterator[None]:
+    """Point `db` at an empty database file for the duration of the block."""
+    import tempfile
+    from pathlib import Path
+
+    import db
+    import models  # noqa: F401  Registers the tables.
+
+    with tempfile.TemporaryDirectory() as directory:
+        db.configure(db.sqlite_url(str(Path(directory) / "bench.db")), profile=profile)
+        try:
+            db.create_db_and_tables()
+            yield
+        finally:
+            db.configure()
+
+
+def _create_goals(count: int) -> list[int]:
+    from domain import Difficulty, Goal, Skill, Stat
+    from repositories import GoalsRepository
+
+    main_skill = Skill(
+        name="bench-main",
+        main_stat=Stat(name="bench-strength"),
+        secondary_stat=Stat(name="bench-int"),
+    )
+    secondary_skill = Skill(name="bench-secondary", main_stat=Stat(name="bench-dex"))
+    with GoalsRepository() as repository:
+        return [
+            repository.create_goal(
+                Goal(
+                    title=f"Goal {i}",
+                    difficulty=Difficulty.HARD,
+                    main_skill=main_skill,
+                    secondary_skill=secondary_skill,
+                )
+            ).id
+            for i in range(count)
+        ]
+
+
+@benchmark
+def bench_commits(args: argparse.Namespace):
+    """Commits and time per goal completion, per repository call vs
+    `UnitOfWork`."""
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+
+    import db
+    from focus import Focus
+
+    commits = []
+
+    def after_commit(session):
+        commits.append(session)
+
+    count = min(args.count, 200)
+    with _temporary_database():
+        goal_ids = _create_goals(2 * count)
+        app = Focus()
+        event.listen(Session, "after_commit", after_commit)
+
+        # Without a unit of work every repository call commits on its own.
+        unit_of_work = db.UnitOfWork
+        db.UnitOfWork = _NoUnitOfWork
+        try:
+            with timed(f"{count} goals, commit per call"):
+                for goal_id in goal_ids[:count]:
+                    app.complete_goal(goal_id)
+        finally:
+            db.UnitOfWork = unit_of_work
+        print(f"commits per goal: {len(commits) / count:.1f}")  # noqa: T201
+
+        commits.clear()
+        with timed(f"{count} goals, unit of work"):
+            for goal_id in goal_ids[count:]:
+                app.complete_goal(goal_id)
+        print(f"commits per goal: {len(commits) / count:.1f}")  # noqa: T201
+
+        event.remove(Session, "after_commit", after_commit)
+
+
+class _NoUnitOfWork:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return None
+
+
+@benchmark
+def bench_profiles(args: argparse.Namespace):
+    """Goal completion and lapse insert latency for each `db.PROFILES`."""
+    import db
+    from focus import Focus
+    from history import History
+    from timer import Lapse, LapseType, from_epoch_us
+
+    count = min(args.count, 200)
+    for profile in db.PROFILES:
+        with _temporary_database(profile):
+            goal_ids = _create_goals(count)
+            app = Focus()
+            start = time.perf_counter()
+            for goal_id in goal_ids:
+                app.complete_goal(goal_id)
+            goal_ms = (time.perf_counter() - start) * 1000 / count
+
+            history = History()
+            start = time.perf_counter()
+            for i in range(count):
+                history.add_entries(
+                    Lapse(
+                        start=from_epoch_us(i * 1_000_000),
+                        end=from_epoch_us((i + 1) * 1_000_000),
+                        type=LapseType.focus,
+                    )
+                )
+            lapse_ms = (time.perf_counter() - start) * 1000 / count
+            history.close()
+
+        print(  # noqa: T201
+            f"{profile}: {goal_ms:.2f}ms per goal completion, "
+            f"{lapse_ms:.2f}ms per lapse insert"
+        )
+
+
+@benchmark
+def bench_replay(args: argparse.Namespace):
+    """Rebuilding skills and stats from `--count` xp events."""
+    import db
+    from domain import Skill, Stat
+    from replay import replay
+    from repositories import SkillRepository
+
+    rng = random.Random(0)  # noqa: S311  Not for security.
+    with _temporary_database():
+        with SkillRepository() as repository:
+            skill_ids = [
+                repository.create_skill(
+                    Skill(
+                        name=f"bench-skill-{i}",
+                        main_stat=Stat(name=f"bench-stat-{i % 10}"),
+                        secondary_stat=Stat(name=f"bench-stat-{(i + 1) % 10}"),
+                    )
+                ).id
+                for i in range(50)
+            ]
+
+        with timed(f"log {args.count} events"):
+            connection = db.raw_connection()
+            connection.driver_connection.executemany(
+                "INSERT INTO xpeventmodel (skill_id, xp, created_at) "
+                "VALUES (?, ?, '2024-01-01 00:00:00')",
+                (
+                    (rng.choice(skill_ids), rng.randrange(1, 200))
+                    for _ in range(args.count)
+                ),
+            )
+            connection.driver_connection.commit()
+            connection.close()
+
+        with timed(f"replay {args.count} events"):
+            replay()
+
+
+# The modules of ours the app imports before its window shows, toga aside,
+# and the import time they may take. Database modules must stay out of them,
+# see `Focus.hydrate`.
+_STARTUP_MODULES = ["focus", "events", "notifications", "scheduling", "views"]
+_STARTUP_BUDGET_MS = 300
+
+
+@benchmark
+def bench_startup(args: argparse.Namespace):
+    """Import time of the start up path, from `python -X importtime`. Fails
+    over `_STARTUP_BUDGET_MS`."""
+    import subprocess
+    import sys
+
+    result = subprocess.run(  # noqa: S603  Our own interpreter and code.
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            f"import {', '.join(_STARTUP_MODULES)}; focus.Focus(hydrate=False)",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    total_us = 0
+    top_level = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        total_us += int(self_us)
+        if not name.startswith("  "):
+            top_level.append((int(cumulative_us), name.strip()))
+
+    for cumulative_us, name in sorted(top_level, reverse=True)[:10]:
+        print(f"{cumulative_us / 1000:8.1f}ms {name}")  # noqa: T201
+
+    total_ms = total_us / 1000
+    print(f"total: {total_ms:.1f}ms, budget: {_STARTUP_BUDGET_MS}ms")  # noqa: T201
+    if total_ms > _STARTUP_BUDGET_MS:
+        sys.exit("Start up imports are over budget.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("name", choices=sorted(_BENCHMARKS))
+    parser.add_argument("--count", type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    _BENCHMARKS[args.name](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,4 +2,5 @@ POMODORO_BLOCK_SIZE = 25 * 60  # seconds
 BASE_XP = 10
 CAP_XP_AT = 30
 BREAK_RATIO = 5
-
+DB_PROFILE = "fast"  # See `db.PROFILES`.
+GOALS_PAGE_SIZE = 50
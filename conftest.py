@@ -1,32 +1,69 @@
 import pytest
-from sqlmodel import Session, SQLModel, create_engine, delete
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import Session as BaseSession
+from sqlmodel import SQLModel, delete
 from sqlmodel.pool import StaticPool
 
 import db
 import models
 from db import get_session
+from identity import identity_map
 
 
 @pytest.fixture(scope="session", autouse=True)
 def engine():
-    engine = create_engine("sqlite://", poolclass=StaticPool)
+    # The background writer uses the connection from a thread of its own.
+    db.configure(
+        "sqlite://",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    )
+    engine = db.get_engine()
     SQLModel.metadata.create_all(engine)
 
-    def get_session_override():
-        return Session(engine, expire_on_commit=False)
-
-    old_internal_session = db._get_session_internal
-    db._get_session_internal = get_session_override
-
     yield engine
 
-    db._get_session_internal = old_internal_session
+    db.configure()
 
 
 @pytest.fixture(autouse=True)
 def delete_skills(engine):
     with get_session() as session:
+        session.exec(delete(models.XpEventModel))
         session.exec(delete(models.GoalModel))
         session.exec(delete(models.SkillModel))
         session.exec(delete(models.StatModel))
         session.commit()
+
+    if inspect(engine).has_table("history"):
+        with engine.begin() as connection:
+            # The daily_totals rows go with them, through its triggers.
+            connection.execute(text("DELETE FROM history"))
+
+    identity_map.clear()
+
+
+@pytest.fixture
+def commits():
+    """Count the commits done by any session."""
+    count = []
+
+    def after_commit(session):
+        count.append(session)
+
+    event.listen(BaseSession, "after_commit", after_commit)
+    yield count
+    event.remove(BaseSession, "after_commit", after_commit)
+
+
+@pytest.fixture
+def statements(engine):
+    """Count the SQL statements run on the test engine."""
+    count = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        count.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield count
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
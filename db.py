@@ -1,17 +1,214 @@
+import os
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import Engine, event, text
+from sqlalchemy.pool import PoolProxiedConnection
 from sqlmodel import Session, SQLModel, create_engine
 
-sqlite_file_name = "focus.db"
-sqlite_url = f"sqlite:///{sqlite_file_name}"
-engine = create_engine(sqlite_url)
+import conf
+from identity import identity_map
+
+
+@dataclass(frozen=True)
+class ConnectionProfile:
+    """SQLite pragmas applied to every new connection.
+
+    :ivar cache_size: Pages if positive, KiB if negative.
+    :ivar mmap_size: Bytes. Zero disables memory mapping.
+    :ivar busy_timeout: Milliseconds to wait for a lock.
+
+    """
+
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    cache_size: int = -16_000
+    mmap_size: int = 64 * 1024 * 1024
+    temp_store: str = "MEMORY"
+    busy_timeout: int = 5000
+
+    def apply(self, dbapi_connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA journal_mode = {self.journal_mode}")
+        cursor.execute(f"PRAGMA synchronous = {self.synchronous}")
+        cursor.execute(f"PRAGMA cache_size = {self.cache_size}")
+        cursor.execute(f"PRAGMA mmap_size = {self.mmap_size}")
+        cursor.execute(f"PRAGMA temp_store = {self.temp_store}")
+        cursor.execute(f"PRAGMA busy_timeout = {self.busy_timeout}")
+        cursor.close()
+
+
+PROFILES = {
+    # WAL with a full sync on every commit: nothing committed is lost on a
+    # power failure.
+    "durable": ConnectionProfile(synchronous="FULL", mmap_size=0),
+    # WAL only syncs on checkpoints: a power failure may lose the last
+    # commits, but never corrupts the database.
+    "fast": ConnectionProfile(),
+}
+
+_url: str | None = None
+_profile: ConnectionProfile | None = None
+_engine_options: dict[str, Any] = {}
+_engines: dict[str, Engine] = {}
+
+
+def _default_url() -> str:
+    return f"sqlite:///{os.environ.get('FOCUS_DB', 'focus.db')}"
+
+
+def _get_profile(profile: str | ConnectionProfile | None) -> ConnectionProfile:
+    if profile is None:
+        profile = conf.DB_PROFILE
+    if isinstance(profile, str):
+        return PROFILES[profile]
+    return profile
+
+
+def configure(
+    url: str | None = None,
+    profile: str | ConnectionProfile | None = None,
+    **engine_options: Any,
+):
+    """Use the database at `url` from now on.
+
+    The default is the file in the `FOCUS_DB` environment variable, or
+    `focus.db`. `profile` is a `ConnectionProfile` or the name of one in
+    `PROFILES`, `conf.DB_PROFILE` by default. `engine_options` are passed to
+    `create_engine`.
+
+    The identity map is cleared, as its objects belong to the old database.
+
+    """
+    global _url, _profile, _engine_options
+
+    engine = _engines.pop(_url or _default_url(), None)
+    if engine is not None:
+        engine.dispose()
+
+    _url = url
+    _profile = _get_profile(profile)
+    _engine_options = engine_options
+    identity_map.clear()
+
+
+def get_engine(url: str | None = None) -> Engine:
+    """The shared engine for `url`, the configured database by default.
+
+    Each database gets a single engine, and so a single connection pool, for
+    the whole process.
+
+    """
+    url = url or _url or _default_url()
+    if url not in _engines:
+        if url == (_url or _default_url()):
+            profile, options = _profile or _get_profile(None), _engine_options
+        else:
+            profile, options = _get_profile(None), {}
+
+        engine = create_engine(url, **options)
+
+        @event.listens_for(engine, "connect")
+        def apply_profile(dbapi_connection, connection_record):
+            profile.apply(dbapi_connection)
+
+        _engines[url] = engine
+
+    return _engines[url]
+
+
+def raw_connection(url: str | None = None) -> PoolProxiedConnection:
+    """A DBAPI connection checked out of the shared pool for `url`.
+
+    Close it to give it back to the pool.
+
+    """
+    return get_engine(url).raw_connection()
+
+
+def sqlite_url(file_name: str) -> str:
+    return f"sqlite:///{file_name}"
 
 
 def create_db_and_tables():
+    engine = get_engine()
     SQLModel.metadata.create_all(engine)
 
+    # `create_all` only creates the indexes of new tables. Databases created
+    # before goals were paged lack this one.
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "CREATE INDEX IF NOT EXISTS ix_goalmodel_completed"
+                " ON goalmodel (completed)"
+            )
+        )
+
 
 def _get_session_internal() -> Session:
-    return Session(engine, expire_on_commit=False)
+    return Session(get_engine(), expire_on_commit=False)
 
 
 def get_session() -> Session:
     return _get_session_internal()
+
+
+_current_unit_of_work: ContextVar["UnitOfWork | None"] = ContextVar(
+    "unit_of_work", default=None
+)
+
+
+def get_unit_of_work() -> "UnitOfWork | None":
+    """The active `UnitOfWork`, if any."""
+    return _current_unit_of_work.get()
+
+
+class UnitOfWork:
+    """I group the changes made through repositories into a single commit.
+
+    Repositories created without a session inside my block join my session and
+    only flush. I commit once when the block exits, or roll back if it raised,
+    and then close the session.
+    A unit of work started inside another one joins the outer one.
+
+    On rollback the rows the repositories touched are invalidated in the
+    identity map, as their objects may hold changes that never reached the
+    database.
+
+    """
+
+    def __init__(self, session: Session | None = None):
+        self.session = session
+        self._outer: UnitOfWork | None = None
+        self._touched: set[tuple[type, int]] = set()
+
+    def __enter__(self) -> "UnitOfWork":
+        self._outer = get_unit_of_work()
+        if self._outer is not None:
+            self.session = self._outer.session
+            self._touched = self._outer._touched
+        elif self.session is None:
+            self.session = get_session()
+
+        self._token = _current_unit_of_work.set(self)
+        return self
+
+    def touch(self, kind: type, id: int):
+        """Invalidate the object for the row if I roll back."""
+        self._touched.add((kind, id))
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _current_unit_of_work.reset(self._token)
+        if self._outer is not None:
+            return
+
+        try:
+            if exc_type is None:
+                self.session.commit()
+            else:
+                self.session.rollback()
+                for kind, id in self._touched:
+                    identity_map.invalidate(kind, id)
+        finally:
+            self.session.close()
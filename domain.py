@@ -6,12 +6,9 @@ from pydantic import AfterValidator
 from sqlmodel import Field, SQLModel
 
 from enums import Difficulty
+from levels import level_curve
 from signals import goal_completed, level_gained, xp_gained
 
-_NEXT_LEVEL_REQUIRED_XP_FACTOR = 1.5
-_MAIN_STAT_INCREASE = 2
-_SECONDARY_STAT_INCREASE = 1
-
 
 def _to_lower(s: str) -> str:
     return s.lower()
@@ -31,24 +28,30 @@ class Skill(SkillBase):
     secondary_stat: Stat | None = None
 
     def add_xp(self, *, xp_earned: int):
+        """Add `xp_earned`, gaining as many levels as it's enough for.
+
+        `level_gained` is sent once, with the number of levels gained.
+
+        """
         self.xp += xp_earned
 
         xp_gained.send(self, xp_earned=xp_earned)
 
-        while self.xp >= self.xp_to_next_level:
-            self.level += 1
-            self.xp -= self.xp_to_next_level
-            self.xp_to_next_level = int(
-                self.xp_to_next_level * _NEXT_LEVEL_REQUIRED_XP_FACTOR
-            )
+        if self.xp < self.xp_to_next_level:
+            return
 
-            # Grant xp to stats.
-            self.main_stat.value += _MAIN_STAT_INCREASE
+        gain = level_curve(self.xp_to_next_level).gain(self.xp)
+        self.level += gain.levels
+        self.xp = gain.xp
+        self.xp_to_next_level = gain.xp_to_next_level
 
-            if self.secondary_stat:
-                self.secondary_stat.value += _SECONDARY_STAT_INCREASE
+        # Grant xp to stats.
+        self.main_stat.value += gain.main_stat_increase
 
-            level_gained.send(self)
+        if self.secondary_stat:
+            self.secondary_stat.value += gain.secondary_stat_increase
+
+        level_gained.send(self, levels=gain.levels)
 
 
 class StatBase(SQLModel):
@@ -64,7 +67,7 @@ class GoalBase(SQLModel):
     title: str
     description: str = ""
     difficulty: Difficulty = Difficulty.EASY
-    completed: bool = False
+    completed: bool = Field(default=False, index=True)
 
 
 _EXCHANGE = {
@@ -81,12 +84,19 @@ class Goal(GoalBase):
     main_skill: Skill
     secondary_skill: Skill | None = None
 
+    def rewards(self) -> list[tuple[Skill, int]]:
+        """The xp each skill earns when I'm completed."""
+        rewards = [(self.main_skill, _EXCHANGE[self.difficulty])]
+
+        if self.secondary_skill:
+            rewards.append((self.secondary_skill, _EXCHANGE[self.difficulty] // 2))
+
+        return rewards
+
     def complete(self):
         self.completed = True
 
-        self.main_skill.add_xp(xp_earned=_EXCHANGE[self.difficulty])
-
-        if self.secondary_skill:
-            self.secondary_skill.add_xp(xp_earned=_EXCHANGE[self.difficulty] // 2)
+        for skill, xp in self.rewards():
+            skill.add_xp(xp_earned=xp)
 
         goal_completed.send(self)
@@ -0,0 +1,105 @@
+"""Batched delivery of skill events."""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from signals import level_gained, skills_changed, xp_gained
+
+if TYPE_CHECKING:
+    from domain import Skill
+
+
+@dataclass(slots=True)
+class SkillChange:
+    """What happened to a skill since the last delivery."""
+
+    skill: Skill
+    xp_earned: int = 0
+    levels: int = 0
+
+
+class EventBus:
+    """I turn `xp_gained` and `level_gained` into `skills_changed` signals,
+    with one `SkillChange` per skill however many events it had.
+
+    Given `schedule`, I buffer events and ask it once to call `flush` later,
+    e.g. with the event loop's `call_soon_threadsafe` to deliver once per UI
+    frame. Without it I deliver each event right away, unless it happens
+    inside `buffering`.
+
+    """
+
+    def __init__(
+        self, schedule: Callable[[Callable[[], None]], object] | None = None
+    ) -> None:
+        self._schedule = schedule
+        self._pending: dict[int, SkillChange] = {}
+        self._flush_scheduled = False
+        self._buffering = 0
+        self._lock = threading.Lock()
+
+        xp_gained.connect(self._xp_gained)
+        level_gained.connect(self._level_gained)
+
+    def _change(self, skill: Skill) -> SkillChange:
+        change = self._pending.get(id(skill))
+        if change is None:
+            change = self._pending[id(skill)] = SkillChange(skill)
+        return change
+
+    def _xp_gained(self, skill: Skill, xp_earned: int):
+        with self._lock:
+            self._change(skill).xp_earned += xp_earned
+        self._request_flush()
+
+    def _level_gained(self, skill: Skill, levels: int):
+        with self._lock:
+            self._change(skill).levels += levels
+        self._request_flush()
+
+    def _request_flush(self):
+        if self._buffering:
+            return
+
+        if self._schedule is None:
+            self.flush()
+            return
+
+        with self._lock:
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        self._schedule(self.flush)
+
+    def flush(self):
+        """Send what's buffered as a single `skills_changed`."""
+        with self._lock:
+            changes = list(self._pending.values())
+            self._pending.clear()
+            self._flush_scheduled = False
+
+        if changes:
+            skills_changed.send(self, changes=changes)
+
+    @contextmanager
+    def buffering(self) -> Iterator[None]:
+        """Hold events raised inside the block, and deliver them together."""
+        self._buffering += 1
+        try:
+            yield
+        finally:
+            self._buffering -= 1
+            if not self._buffering:
+                self._request_flush()
+
+    def close(self):
+        """Stop listening. Buffered events are dropped."""
+        xp_gained.disconnect(self._xp_gained)
+        level_gained.disconnect(self._level_gained)
+        with self._lock:
+            self._pending.clear()
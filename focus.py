@@ -1,20 +1,132 @@
-import db
-from domain import Goal, Skill, Stat
-from repositories import (
-    GoalsRepository,
-    GoalUpdate,
-    SkillUpdate,
-    StatsRepository,
-)
-from repositories import (
-    SkillRepository as NewSkillRepository,
-)
-from signals import goal_added
-from timer import Timer
-from services import SkillsService
+from __future__ import annotations
+
+import datetime as dt
+import math
+import threading
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
 import conf
+from signals import goal_added
+from timer import Lapse, LapseType, Timer, _now
+from writer import SynchronousWriter
+
+# The database modules bring in SQLAlchemy, SQLModel and pydantic, which are
+# most of the start up time. They're imported where used, so the timers work
+# before `Focus.hydrate` has run.
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from domain import Goal, Skill, Stat
+    from history import History
+    from repositories import GoalUpdate, SkillUpdate
+    from writer import BackgroundWriter
 
 
+@dataclass(frozen=True, slots=True)
+class TickSnapshot:
+    """State of a `Focus` taken from a single clock read. In seconds.
+
+    :ivar clock: Elapsed time for the current working timer.
+    :ivar earned_break_time: Break balance, including the current lapse.
+    :ivar break_exhausted: The break balance went below zero.
+    :ivar until_next_second: Seconds until `clock` changes. `inf` if it won't.
+
+    """
+
+    clock: int
+    total_focused: int
+    total_rested: int
+    earned_break_time: int
+    break_exhausted: bool
+    focusing: bool
+    resting: bool
+    paused: bool
+    until_next_second: float
+
+
+def _skill_update(skill: Skill) -> SkillUpdate:
+    from repositories import SkillUpdate
+
+    return SkillUpdate(
+        id=skill.id,
+        name=skill.name,
+        level=skill.level,
+        xp=skill.xp,
+        xp_to_next_level=skill.xp_to_next_level,
+        main_stat=skill.main_stat,
+        secondary_stat=skill.secondary_stat,
+    )
+
+
+def _completion_update(goal: Goal) -> GoalUpdate:
+    """The changes to store after `goal` is completed."""
+    from repositories import GoalUpdate
+
+    return GoalUpdate(
+        id=goal.id,
+        completed=goal.completed,
+        main_skill=_skill_update(goal.main_skill),
+        secondary_skill=_skill_update(goal.secondary_skill)
+        if goal.secondary_skill
+        else None,
+    )
+
+
+def _rewarded_skills(goal: Goal) -> list[tuple[Skill, SkillUpdate]]:
+    """The skills `goal` rewards, with a snapshot of each."""
+    return [(skill, _skill_update(skill)) for skill, _ in goal.rewards()]
+
+
+def _undo_completion(goal: Goal, before: list[tuple[Skill, SkillUpdate]]):
+    """Put `goal`, and the skills it rewarded, back as they were `before`."""
+    goal.completed = False
+    for skill, snapshot in before:
+        skill.level = snapshot.level
+        skill.xp = snapshot.xp
+        skill.xp_to_next_level = snapshot.xp_to_next_level
+        for stat, stat_snapshot in (
+            (skill.main_stat, snapshot.main_stat),
+            (skill.secondary_stat, snapshot.secondary_stat),
+        ):
+            if stat is not None:
+                stat.value = stat_snapshot.value
+
+
+class GoalsPager:
+    """I load the goals of a `Focus` one page at a time.
+
+    :ivar exhausted: There are no more pages.
+
+    """
+
+    def __init__(self, focus: Focus, *, completed: bool = False) -> None:
+        self._focus = focus
+        self._completed = completed
+        self._after_id: int | None = None
+        self.exhausted = False
+
+    def next_page(self) -> list[Goal]:
+        if self.exhausted:
+            return []
+
+        goals = self._focus.load_goals(
+            completed=self._completed, after_id=self._after_id
+        )
+        if goals:
+            self._after_id = goals[-1].id
+        self.exhausted = len(goals) < conf.GOALS_PAGE_SIZE
+
+        return goals
+
+    def loaded(self, goal_id: int) -> bool:
+        """Whether the pages loaded so far cover `goal_id`. A goal that joins
+        the list later, like one just completed, isn't loaded again, so it
+        must be added apart when this is `True`."""
+        return self.exhausted or (
+            self._after_id is not None and goal_id <= self._after_id
+        )
+
 
 class Focus:
     """Main Focus class.
@@ -23,51 +135,112 @@ class Focus:
 
     I have two timers: one for focused time and one for break time.
 
+    Changes to skills and the history are persisted through a writer, so
+    they don't block the caller. Call `close` before exiting so none is lost.
+
+    Stats, skills and goals are loaded by `hydrate`, by default when I'm
+    created. The app creates me with `hydrate=False` to show its window
+    first, and calls `hydrate_async` afterwards.
+
     :ivar focus_break_ratio: The ratio to use to calculate earned_break_time.
     :ivar current_skill: The skil for the current session.
 
     """
 
-    def __init__(self):
-        db.create_db_and_tables()
+    def __init__(
+        self,
+        writer: BackgroundWriter | SynchronousWriter | None = None,
+        history: History | None = None,
+        *,
+        hydrate: bool = True,
+    ):
+        self._writer = writer or SynchronousWriter()
+        self.history = history
+        # Lapses, and xp earned before `hydrate`, waiting to be written.
+        self._pending_lapses: list[Lapse] = []
+        self._pending_xp = 0
+        self._pending_lock = threading.Lock()
+
         self.focused_timer = Timer()
         self.breaks_timer = Timer()
+        # When the current focus, rest or pause lapse started.
+        self._segment_start: dt.datetime | None = None
 
         self.earned_break_time: int = 0
         self.focus_break_ratio = conf.BREAK_RATIO
 
-        self._stats_repository = StatsRepository()
         self.stats: dict[str, Stat] = {}
-        self.load_stats()
-
-        self._skills_repository = NewSkillRepository()
         self.new_skills: dict[str, Skill] = {}
-        self.load_skills()
-
-        skills = list(self.new_skills.values())
+        self.current_skill: Skill | None = None
 
-        skill = None
-        if skills:
-            skill = skills[0]
+        # Only the goals loaded so far. Pages of incomplete ones are loaded
+        # through `incomplete_goals`, completed ones when asked for.
+        self.goals: dict[int, Goal] = {}
+        self.incomplete_goals = GoalsPager(self)
 
-        self.current_skill: Skill | None = skill
+        self.hydrated = False
+        if hydrate:
+            self.hydrate()
 
-        self._goals_repository = GoalsRepository()
+    def hydrate(self):
+        """Create the database if needed, and load stats, skills and the first
+        page of incomplete goals."""
+        import db
+        from history import History
 
-        self.goals: dict[int, Goal] = {}
-        self.load_goals()
+        db.create_db_and_tables()
+        if self.history is None:
+            self.history = History()
 
-    def load_goals(self):
-        for goal in self._goals_repository.get_all_goals():
+        self.load_stats()
+        self.load_skills()
+        self.incomplete_goals.next_page()
+
+        with self._pending_lock:
+            self.current_skill = next(iter(self.new_skills.values()), None)
+            self.hydrated = True
+            xp, self._pending_xp = self._pending_xp, 0
+            has_pending_lapses = bool(self._pending_lapses)
+
+        if xp:
+            self._add_xp(xp)
+        if has_pending_lapses:
+            self._writer.submit(self._write_lapses, key="history")
+
+    async def hydrate_async(self):
+        """Like `hydrate`, on the database thread."""
+        from async_repositories import run_on_database_thread
+
+        await run_on_database_thread(self.hydrate)
+
+    def load_goals(
+        self, *, completed: bool = False, after_id: int | None = None
+    ) -> list[Goal]:
+        """Load the page of goals after `after_id`. See `GoalsPager`."""
+        from repositories import GoalsRepository
+
+        with GoalsRepository() as repository:
+            goals = repository.get_goals_page(
+                completed=completed, after_id=after_id, limit=conf.GOALS_PAGE_SIZE
+            )
+        for goal in goals:
             self.goals[goal.id] = goal
 
+        return goals
+
     def load_skills(self):
-        for skill in self._skills_repository.get_all_skills():
-            self.new_skills[skill.name] = skill
+        from repositories import SkillRepository
+
+        with SkillRepository() as repository:
+            for skill in repository.get_all_skills():
+                self.new_skills[skill.name] = skill
 
     def load_stats(self):
-        for stat in self._stats_repository.get_all_stats():
-            self.stats[stat.name] = stat
+        from repositories import StatsRepository
+
+        with StatsRepository() as repository:
+            for stat in repository.get_all_stats():
+                self.stats[stat.name] = stat
 
     @property
     def focusing(self) -> bool:
@@ -86,57 +259,103 @@ class Focus:
         return self.focused_timer.paused or self.breaks_timer.paused
 
     def add_goal(self, goal: Goal):
-        new_goal = GoalsRepository().create_goal(goal)
+        from repositories import GoalsRepository
+
+        with GoalsRepository() as repository:
+            new_goal = repository.create_goal(goal)
+
+        self.goals[new_goal.id] = new_goal
+
+        goal_added.send(goal)
+
+    async def add_goal_async(self, goal: Goal):
+        """Like `add_goal`, without blocking the event loop. The goal is
+        created by the writer, with the other changes."""
+        from repositories import GoalsRepository
+
+        new_goal = await self._write(lambda: GoalsRepository().create_goal(goal))
 
         self.goals[new_goal.id] = new_goal
 
         goal_added.send(goal)
 
     def complete_goal(self, goal_id: int) -> bool:
-        """`False` means goal was already completed. No callbacks were run."""
-        goals_repository = GoalsRepository()
-        goal = goals_repository.get_goal_by_id(goal_id)
+        """`False` means goal was already completed. No callbacks were run.
+
+        All the changes are committed at once.
+
+        """
+        import db
+        from repositories import GoalsRepository
+
+        with db.UnitOfWork():
+            goals_repository = GoalsRepository()
+            goal = goals_repository.get_goal_by_id(goal_id)
+
+            if goal.completed:
+                return False
+
+            before = _rewarded_skills(goal)
+            goal.complete()
+
+            try:
+                self._store_completion(_completion_update(goal), goal)
+            except Exception:
+                _undo_completion(goal, before)
+                raise
+
+            return True
+
+    async def complete_goal_async(self, goal_id: int) -> bool:
+        """Like `complete_goal`, without blocking the event loop.
+
+        Callbacks run on the loop, before the writer stores the changes. If
+        storing them fails, the goal and its skills are put back as they were,
+        so it can be completed again.
+
+        """
+        from async_repositories import AsyncGoalsRepository
+
+        goal = self.goals.get(goal_id)
+        if goal is None:
+            goal = await AsyncGoalsRepository().get_goal_by_id(goal_id)
 
         if goal.completed:
             return False
 
+        before = _rewarded_skills(goal)
         goal.complete()
+        # Taken here, as the skills keep changing on this thread.
+        completion = _completion_update(goal)
 
-        goals_repository.update_goal(
-            GoalUpdate(
-                id=goal.id,
-                completed=goal.completed,
-                main_skill=SkillUpdate(
-                    id=goal.main_skill.id,
-                    name=goal.main_skill.name,
-                    level=goal.main_skill.level,
-                    xp=goal.main_skill.xp,
-                    xp_to_next_level=goal.main_skill.xp_to_next_level,
-                    main_stat=goal.main_skill.main_stat,
-                    secondary_stat=goal.main_skill.secondary_stat,
-                ),
-                secondary_skill=SkillUpdate(
-                    id=goal.secondary_skill.id,
-                    name=goal.secondary_skill.name,
-                    level=goal.secondary_skill.level,
-                    xp=goal.secondary_skill.xp,
-                    xp_to_next_level=goal.secondary_skill.xp_to_next_level,
-                    main_stat=goal.secondary_skill.main_stat,
-                    secondary_stat=goal.secondary_skill.secondary_stat,
-                )
-                if goal.secondary_skill
-                else None,
-            )
-        )
+        try:
+            await self._write(lambda: self._store_completion(completion, goal))
+        except Exception:
+            _undo_completion(goal, before)
+            raise
 
         return True
 
+    async def _write[T](self, command: Callable[[], T]) -> T:
+        """Run `command` through the writer, and wait for it to be written."""
+        import asyncio
+
+        return await asyncio.wrap_future(self._writer.call(command))
+
+    def _store_completion(self, completion: GoalUpdate, goal: Goal):
+        from repositories import GoalsRepository, XpEventRepository
+
+        GoalsRepository().store_completion(completion)
+        XpEventRepository().record_rewards(goal)
+
     def focus(self):
         """I start a focus session."""
         if self.resting:
             self.earned_break_time -= self.get_current_clock_time()
-        lapse = self.breaks_timer.stop()
-        lapse = self.focused_timer.start()
+        if not self.focusing:
+            self._next_segment()
+        self.breaks_timer.stop()
+        self.focused_timer.start()
 
     def set_current_skill(self, name: str) -> bool:
         """:return: True if skill change successfully."""
@@ -154,34 +373,131 @@ class Focus:
         """
         if self.focusing:
             current_clock_time = self.get_current_clock_time()
-            SkillsService().grant_xp(
+            self._add_xp(
                 min(
                     int(conf.BASE_XP * current_clock_time // conf.POMODORO_BLOCK_SIZE),
                     conf.CAP_XP_AT,
-                ),
-                skill_id=self.current_skill.id,
+                )
             )
 
             self.earned_break_time += current_clock_time // self.focus_break_ratio
 
+        if not self.resting:
+            self._next_segment()
         self.focused_timer.stop()
         self.breaks_timer.start()
 
     def pause(self):
+        if self.focusing or self.resting:
+            self._next_segment()
+
         if self.focusing:
             self.focused_timer.pause()
         elif self.resting:
             self.breaks_timer.pause()
 
     def unpause(self):
+        if self.paused:
+            self._next_segment()
+
         if self.focused_timer.paused:
-            lapse = self.focused_timer.start()
-            # if lapse:
-            #     self.history.add_entries(lapse)
+            self.focused_timer.start()
         elif self.breaks_timer.paused:
-            lapse = self.breaks_timer.start()
-            # if lapse:
-            #     self.history.add_entries(lapse)
+            self.breaks_timer.start()
+
+    def _segment_type(self) -> LapseType | None:
+        """The type of the lapse the timers are in."""
+        if self.focusing:
+            return LapseType.focus
+        if self.resting:
+            return LapseType.rest
+        if self.paused:
+            return LapseType.pause
+        return None
+
+    def _next_segment(self):
+        """Record the lapse the timers were in until now, before they change.
+
+        Each stretch of focus, rest or pause is a lapse of its own, so pauses
+        aren't counted as focus or rest.
+
+        """
+        now = _now()
+        type = self._segment_type()
+        if type is not None and self._segment_start is not None:
+            self._record_lapse(Lapse(start=self._segment_start, end=now, type=type))
+        self._segment_start = now
+
+    def _add_xp(self, xp: int):
+        """Add `xp` to the current skill. Before `hydrate` there's none yet,
+        so it's kept until `hydrate` picks one."""
+        with self._pending_lock:
+            skill = self.current_skill
+            if skill is None and not self.hydrated:
+                self._pending_xp += xp
+                return
+
+        if skill is not None:
+            skill.add_xp(xp_earned=xp)
+            self._store_skill(skill, xp)
+
+    def _store_skill(self, skill: Skill, xp_earned: int):
+        """Persist `skill`, and log the xp it earned, in the background. Only
+        the latest state is written if it changes again before the writer
+        gets to it. Every xp event is logged.
+
+        The writer gets a snapshot taken here, as the skill keeps changing on
+        this thread while it writes.
+
+        """
+        from repositories import SkillRepository, XpEventRepository
+
+        snapshot = _skill_update(skill)
+        self._writer.submit(
+            lambda: SkillRepository().store_skill(snapshot), key=("skill", skill.id)
+        )
+        self._writer.submit(
+            lambda: XpEventRepository().record_xp(snapshot.id, xp_earned)
+        )
+
+    def _record_lapse(self, lapse: Lapse):
+        """Add `lapse` to the history in the background.
+
+        Lapses recorded before the writer runs are added together.
+
+        """
+        with self._pending_lock:
+            self._pending_lapses.append(lapse)
+        self._writer.submit(self._write_lapses, key="history")
+
+    def _write_lapses(self):
+        if self.history is None:
+            # Not hydrated yet; `hydrate` submits them again.
+            return
+
+        with self._pending_lock:
+            lapses, self._pending_lapses = self._pending_lapses, []
+        try:
+            self.history.add_entries(lapses)
+        except Exception:
+            # Put them back, for the writer to try again.
+            with self._pending_lock:
+                self._pending_lapses[:0] = lapses
+            raise
+
+    def flush(self) -> bool:
+        """Wait until every pending change is persisted.
+
+        :return: `False` if some still fail.
+
+        """
+        return self._writer.flush()
+
+    def close(self):
+        """Persist pending changes and release the writer and the history."""
+        self._writer.close()
+        if self.history is not None:
+            self.history.close()
 
     def get_current_clock_time(self) -> int:
         """I return elapsed time for current working timer."""
@@ -193,6 +509,39 @@ class Focus:
 
         return 0
 
+    def snapshot(self) -> TickSnapshot:
+        """I return the current state, computed from one clock read."""
+        now = _now()
+        focusing = self.focusing
+
+        clock = 0
+        until_next_second = math.inf
+        if focusing:
+            clock = self.focused_timer.get_current_elapsed_time(now)
+            until_next_second = self.focused_timer.get_seconds_to_next_second(now)
+        elif self.resting:
+            clock = self.breaks_timer.get_current_elapsed_time(now)
+            until_next_second = self.breaks_timer.get_seconds_to_next_second(now)
+
+        if focusing:
+            earned_break_time = self.earned_break_time + clock // self.focus_break_ratio
+            break_exhausted = self.earned_break_time < 0
+        else:
+            earned_break_time = self.earned_break_time - clock
+            break_exhausted = earned_break_time < 0
+
+        return TickSnapshot(
+            clock=clock,
+            total_focused=self.focused_timer.get_total_elapsed_time(now),
+            total_rested=self.breaks_timer.get_total_elapsed_time(now),
+            earned_break_time=earned_break_time,
+            break_exhausted=break_exhausted,
+            focusing=focusing,
+            resting=self.resting,
+            paused=self.paused,
+            until_next_second=until_next_second,
+        )
+
     def get_total_focused_seconds(self) -> int:
         return self.focused_timer.get_total_elapsed_time()
 
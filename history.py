@@ -1,10 +1,15 @@
 import datetime as dt
-import sqlite3
-from dataclasses import dataclass
+import itertools
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from typing import Literal
 
-from timer import Lapse, LapseType
+import db
+from timer import Lapse, LapseStore, LapseType, from_epoch_us, to_epoch_us
 
-sqlite3.register_converter("DATETIME", lambda x: dt.datetime.fromisoformat(x.decode()))
+# Version 0 stored `start` and `end` as ISO strings. Version 1 stores them as
+# integer microseconds since the epoch.
+_SCHEMA_VERSION = 1
 
 
 @dataclass
@@ -13,63 +18,350 @@ class Stats:
 
     total_focus_time: int
     total_break_time: int
+    total_pause_time: int = 0
+
+
+@dataclass
+class StatsRange:
+    """Totals per bucket, in seconds. The columns are aligned by position:
+    `total_focus_time[i]` is the focus time for the bucket starting at
+    `buckets[i]`.
+
+    """
+
+    buckets: list[dt.date] = field(default_factory=list)
+    total_focus_time: list[int] = field(default_factory=list)
+    total_break_time: list[int] = field(default_factory=list)
+    total_pause_time: list[int] = field(default_factory=list)
+
+
+Bucket = Literal["day", "week", "month"]
+
+_BUCKET_SQL = {
+    "day": "day",
+    "week": "date(day, 'weekday 0', '-6 days')",
+    "month": "date(day, 'start of month')",
+}
+
+
+def _bucket_start(date: dt.date, bucket: Bucket) -> dt.date:
+    if bucket == "week":
+        return date - dt.timedelta(days=date.weekday())
+    if bucket == "month":
+        return date.replace(day=1)
+    return date
+
+
+def _next_bucket(date: dt.date, bucket: Bucket) -> dt.date:
+    if bucket == "week":
+        return date + dt.timedelta(weeks=1)
+    if bucket == "month":
+        return (date + dt.timedelta(days=31)).replace(day=1)
+    return date + dt.timedelta(days=1)
+
+
+@dataclass
+class IngestResult:
+    """Outcome of adding entries to the history."""
+
+    inserted: int = 0
+    skipped: int = 0
 
 
 class History:
     """The history is stored in db as entries with a start date and an end date.
     The start_date is unique.
 
+    Dates are stored as microseconds since the epoch, in UTC.
+
     """
 
-    def __init__(self, db_name: str = "focus.db"):
-        """Initialize the sqlite db."""
+    def __init__(self, db_name: str | None = None):
+        """Initialize the sqlite db.
+
+        :param db_name: The database file. The one configured in `db` if
+            `None`. The connection comes from its shared pool.
 
-        self.conn = sqlite3.connect(
-            db_name, detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES
+        """
+        self._connection = db.raw_connection(
+            db.sqlite_url(db_name) if db_name else None
         )
-        self.conn.row_factory = sqlite3.Row
+        self.conn = self._connection.driver_connection
+
+        tables = self._get_tables()
+        (version,) = self.conn.execute("PRAGMA user_version").fetchone()
+
+        if "history" in tables and version < _SCHEMA_VERSION:
+            self._migrate_text_dates()
+        else:
+            self._create_schema()
+            if {"history", "daily_totals"} - tables:
+                self.rebuild_daily_totals()
+
+        self.conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
 
+    def close(self):
+        """Give the connection back to the pool."""
+        self._connection.close()
+
+    def _create_schema(self):
         # Primary key is to avoid inserting duplicated entries.
         self.conn.execute("""
         CREATE TABLE IF NOT EXISTS history (
-        start DATETIME PRIMARY KEY,
-        end DATETIME NOT NULL,
+        start INTEGER PRIMARY KEY,
+        end INTEGER NOT NULL,
         type TEXT NOT NULL CHECK (type IN ('rest', 'focus', 'pause'))
         );""")
+        # Covers the per-type date range lookups on `history`.
+        self.conn.execute("""
+        CREATE INDEX IF NOT EXISTS history_type_start
+        ON history (type, start, end);""")
 
-    def add_entries(self, entries: Lapse | list[Lapse]):
-        """Add `entries` to the history of the user."""
-        if isinstance(entries, Lapse):
-            entries = [entries]
+        # Totals per day and lapse type, kept up to date by triggers in the
+        # same transaction as the changes to `history`.
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS daily_totals (
+        day TEXT NOT NULL,
+        type TEXT NOT NULL,
+        total_seconds INTEGER NOT NULL,
+        PRIMARY KEY (day, type)
+        ) WITHOUT ROWID;""")
+        self.conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS history_insert_daily_totals
+        AFTER INSERT ON history
+        BEGIN
+        INSERT INTO daily_totals (day, type, total_seconds)
+        VALUES (
+            date(NEW.start / 1000000, 'unixepoch'),
+            NEW.type,
+            (NEW.end - NEW.start) / 1000000
+        )
+        ON CONFLICT (day, type)
+        DO UPDATE SET total_seconds = total_seconds + excluded.total_seconds;
+        END;""")
+        self.conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS history_delete_daily_totals
+        AFTER DELETE ON history
+        BEGIN
+        UPDATE daily_totals
+        SET total_seconds = total_seconds - (OLD.end - OLD.start) / 1000000
+        WHERE day = date(OLD.start / 1000000, 'unixepoch') AND type = OLD.type;
+        END;""")
+        self.conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS history_update_daily_totals
+        AFTER UPDATE OF start, end, type ON history
+        BEGIN
+        UPDATE daily_totals
+        SET total_seconds = total_seconds - (OLD.end - OLD.start) / 1000000
+        WHERE day = date(OLD.start / 1000000, 'unixepoch') AND type = OLD.type;
+        INSERT INTO daily_totals (day, type, total_seconds)
+        VALUES (
+            date(NEW.start / 1000000, 'unixepoch'),
+            NEW.type,
+            (NEW.end - NEW.start) / 1000000
+        )
+        ON CONFLICT (day, type)
+        DO UPDATE SET total_seconds = total_seconds + excluded.total_seconds;
+        END;""")
 
+    def _migrate_text_dates(self):
+        """Move a version 0 history, with ISO string dates, to the current
+        schema in a single transaction."""
         with self.conn:
-            for entry in entries:
-                try:
-                    self.conn.execute(
-                        """
-                    INSERT INTO history (start, end, type)
-                    VALUES (?, ?, ?)
-                    """,
-                        (
-                            entry.start,
-                            entry.end,
-                            entry.type,
-                        ),
+            self.conn.execute("BEGIN")
+            self.conn.execute("DROP TRIGGER IF EXISTS history_insert_daily_totals")
+            self.conn.execute("DROP TRIGGER IF EXISTS history_delete_daily_totals")
+            self.conn.execute("DROP TRIGGER IF EXISTS history_update_daily_totals")
+            self.conn.execute("DROP INDEX IF EXISTS history_type_start")
+            self.conn.execute("DROP TABLE IF EXISTS daily_totals")
+            self.conn.execute("ALTER TABLE history RENAME TO history_v0")
+
+            self._create_schema()
+
+            rows = self.conn.execute("SELECT start, end, type FROM history_v0")
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO history (start, end, type) VALUES (?, ?, ?)",
+                (
+                    (
+                        to_epoch_us(dt.datetime.fromisoformat(start)),
+                        to_epoch_us(dt.datetime.fromisoformat(end)),
+                        type,
                     )
-                except sqlite3.IntegrityError as e:
-                    print("Integrity Error", e)  # noqa: T201  Later, I'll use logging.
+                    for start, end, type in rows
+                ),
+            )
+            self.conn.execute("DROP TABLE history_v0")
+            self.conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
 
-    def get_entries(self) -> list[Lapse]:
+    def _get_tables(self) -> set[str]:
+        result = self.conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'"
+        )
+        return {name for (name,) in result}
+
+    def rebuild_daily_totals(self):
+        """Recompute `daily_totals` from the whole history.
+
+        Needed for databases created before the rollup existed.
+
+        """
         with self.conn:
-            res = self.conn.execute(
-                """
-            SELECT start, end, type FROM history;
-            """
+            self.conn.execute("DELETE FROM daily_totals")
+            self.conn.execute("""
+            INSERT INTO daily_totals (day, type, total_seconds)
+            SELECT date(start / 1000000, 'unixepoch') AS day, type,
+            SUM((end - start) / 1000000)
+            FROM history
+            GROUP BY day, type
+            """)
+
+    def check_daily_totals(self) -> list[tuple[str, str]]:
+        """:return: The `(day, type)` pairs where `daily_totals` doesn't
+        match the history. Empty if consistent."""
+        with self.conn:
+            expected = {
+                (day, type): total_seconds
+                for day, type, total_seconds in self.conn.execute("""
+                SELECT date(start / 1000000, 'unixepoch') AS day, type,
+                SUM((end - start) / 1000000) AS total_seconds
+                FROM history
+                GROUP BY day, type
+                """)
+            }
+            stored = {
+                (day, type): total_seconds
+                for day, type, total_seconds in self.conn.execute(
+                    "SELECT day, type, total_seconds FROM daily_totals"
+                )
+                if total_seconds
+            }
+
+        return sorted(
+            key
+            for key in expected.keys() | stored.keys()
+            if expected.get(key, 0) != stored.get(key, 0)
+        )
+
+    def add_entries(
+        self, entries: Lapse | Iterable[Lapse], chunk_size: int = 1000
+    ) -> IngestResult:
+        """Add `entries` to the history of the user.
+
+        Entries are consumed lazily and inserted `chunk_size` at a time, one
+        transaction per chunk. Entries already in the history are skipped.
+
+        """
+        if isinstance(entries, Lapse):
+            entries = [entries]
+
+        if isinstance(entries, LapseStore):
+            rows = entries.rows()
+        else:
+            rows = (
+                (to_epoch_us(entry.start), to_epoch_us(entry.end), entry.type)
+                for entry in entries
             )
-            return [
-                Lapse(start=row["start"], end=row["end"], type=row["type"])
-                for row in res.fetchall()
-            ]
+
+        result = IngestResult()
+        for chunk in itertools.batched(rows, chunk_size, strict=False):
+            with self.conn:
+                cursor = self.conn.executemany(
+                    """
+                INSERT OR IGNORE INTO history (start, end, type)
+                VALUES (?, ?, ?)
+                """,
+                    chunk,
+                )
+                # Unlike `total_changes`, this doesn't count trigger changes.
+                inserted = cursor.rowcount
+
+            result.inserted += inserted
+            result.skipped += len(chunk) - inserted
+
+        return result
+
+    def get_entries(self) -> list[Lapse]:
+        return list(self.iter_entries())
+
+    def iter_entries(
+        self,
+        *,
+        since: dt.datetime | None = None,
+        until: dt.datetime | None = None,
+        type: LapseType | None = None,
+        limit: int | None = None,
+        page_size: int = 1000,
+    ) -> Iterator[Lapse]:
+        """Yield entries ordered by start, reading `page_size` rows at a time.
+
+        :param since: Only entries starting at or after this moment.
+        :param until: Only entries starting before this moment.
+        :param type: Only entries of this type.
+        :param limit: Yield at most this many entries.
+
+        """
+        for start, end, lapse_type in self._iter_rows(
+            since=since, until=until, type=type, limit=limit, page_size=page_size
+        ):
+            yield Lapse(
+                start=from_epoch_us(start), end=from_epoch_us(end), type=lapse_type
+            )
+
+    def get_store(
+        self,
+        *,
+        since: dt.datetime | None = None,
+        until: dt.datetime | None = None,
+        type: LapseType | None = None,
+        limit: int | None = None,
+    ) -> LapseStore:
+        """Load entries into a `LapseStore`. Filters as in `iter_entries`."""
+        store = LapseStore()
+        for row in self._iter_rows(since=since, until=until, type=type, limit=limit):
+            store.append_row(*row)
+
+        return store
+
+    def _iter_rows(
+        self,
+        *,
+        since: dt.datetime | None = None,
+        until: dt.datetime | None = None,
+        type: LapseType | None = None,
+        limit: int | None = None,
+        page_size: int = 1000,
+    ) -> Iterator[tuple[int, int, LapseType]]:
+        conditions = ["start > ?"]
+        parameters: list[object] = [to_epoch_us(since) - 1 if since else -1]
+        if until is not None:
+            conditions.append("start < ?")
+            parameters.append(to_epoch_us(until))
+        if type is not None:
+            conditions.append("type = ?")
+            parameters.append(type)
+
+        query = f"""
+        SELECT start, end, type FROM history
+        WHERE {" AND ".join(conditions)}
+        ORDER BY start
+        LIMIT ?
+        """  # noqa: S608  Only fixed conditions are interpolated.
+
+        remaining = limit
+        while remaining is None or remaining > 0:
+            page = min(page_size, remaining) if remaining is not None else page_size
+            rows = self.conn.execute(query, (*parameters, page)).fetchall()
+
+            for start, end, lapse_type in rows:
+                yield start, end, LapseType(lapse_type)
+
+            if len(rows) < page:
+                return
+
+            # Keyset pagination: the next page starts after the last start seen.
+            parameters[0] = rows[-1][0]
+            if remaining is not None:
+                remaining -= len(rows)
 
     def get_statistics(self, date: dt.date | None = None) -> Stats:
         """:param date: If date is None, default today will be used."""
@@ -81,29 +373,71 @@ class History:
         with self.conn:
             result = self.conn.execute(
                 """
-            SELECT IFNULL(SUM(strftime('%s', end) - strftime('%s', start)), 0) AS total_seconds
-            FROM history
-            WHERE date(start) = ?
-            AND type = ?
+            SELECT type, total_seconds
+            FROM daily_totals
+            WHERE day = ?
             """,
-                (date, LapseType.focus),
+                (date.isoformat(),),
             )
 
-            total_focus_time = result.fetchone()["total_seconds"]
+            totals = dict(result.fetchall())
+
+        return Stats(
+            total_focus_time=totals.get(LapseType.focus, 0),
+            total_break_time=totals.get(LapseType.rest, 0),
+            total_pause_time=totals.get(LapseType.pause, 0),
+        )
+
+    def get_statistics_range(
+        self, start_date: dt.date, end_date: dt.date, bucket: Bucket = "day"
+    ) -> StatsRange:
+        """Totals for every bucket between `start_date` and `end_date`, both
+        included. Weeks start on Monday. Buckets partially out of the range
+        only count the entries inside it.
+
+        """
+        if bucket not in _BUCKET_SQL:
+            raise ValueError(f"Unknown bucket: {bucket}")  # noqa: TRY003  Names the bad value.
 
         with self.conn:
             result = self.conn.execute(
-                """
-            SELECT IFNULL(SUM(strftime('%s', end) - strftime('%s', start)), 0) AS total_seconds
-            FROM history
-            WHERE date(start) = ?
-            AND type = ?
-            """,
-                (date, LapseType.rest),
+                f"""
+            SELECT {_BUCKET_SQL[bucket]} AS bucket, type,
+            SUM(total_seconds) AS total_seconds
+            FROM daily_totals
+            WHERE day >= ? AND day <= ?
+            GROUP BY bucket, type
+            """,  # noqa: S608  Only known bucket expressions are interpolated.
+                (start_date.isoformat(), end_date.isoformat()),
             )
 
-            total_break_time = result.fetchone()["total_seconds"]
+            totals = {
+                (bucket, type): total_seconds for bucket, type, total_seconds in result
+            }
 
-        return Stats(
-            total_focus_time=total_focus_time, total_break_time=total_break_time
-        )
+        stats = StatsRange()
+        current = _bucket_start(start_date, bucket)
+        while current <= end_date:
+            key = current.isoformat()
+            stats.buckets.append(current)
+            stats.total_focus_time.append(totals.get((key, LapseType.focus), 0))
+            stats.total_break_time.append(totals.get((key, LapseType.rest), 0))
+            stats.total_pause_time.append(totals.get((key, LapseType.pause), 0))
+            current = _next_bucket(current, bucket)
+
+        return stats
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Maintain the focus history.")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    parser.add_argument("db_name", nargs="?")
+    args = parser.parse_args()
+
+    history = History(db_name=args.db_name)
+    if args.command == "rebuild":
+        history.rebuild_daily_totals()
+    for day, type in history.check_daily_totals():
+        print("Inconsistent daily total", day, type)  # noqa: T201
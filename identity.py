@@ -0,0 +1,64 @@
+import threading
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+
+class IdentityMap:
+    """I keep one in-memory domain object per database row.
+
+    Objects are keyed by their type and id. Objects with a `name` can also be
+    found by name. Repositories consult me before querying and write changes
+    through to the objects I hold. I'm shared between threads, so every
+    method holds my lock.
+
+    """
+
+    def __init__(self) -> None:
+        self._by_id: dict[tuple[type, int], Any] = {}
+        self._by_name: dict[tuple[type, str], Any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, kind: type[T], id: int) -> T | None:
+        with self._lock:
+            return self._by_id.get((kind, id))
+
+    def get_by_name(self, kind: type[T], name: str) -> T | None:
+        with self._lock:
+            return self._by_name.get((kind, name))
+
+    def add(self, obj: T) -> T:
+        """Register `obj`.
+
+        :return: The object already registered for the same row, if any.
+            `obj` otherwise.
+
+        """
+        key = (type(obj), obj.id)  # type: ignore[attr-defined]
+        with self._lock:
+            if key in self._by_id:
+                return self._by_id[key]
+
+            self._by_id[key] = obj
+            name = getattr(obj, "name", None)
+            if name is not None:
+                self._by_name[type(obj), name] = obj
+
+            return obj
+
+    def invalidate(self, kind: type, id: int):
+        """Forget the object for a row. The next read loads it again."""
+        with self._lock:
+            obj = self._by_id.pop((kind, id), None)
+            name = getattr(obj, "name", None)
+            if name is not None and self._by_name.get((kind, name)) is obj:
+                del self._by_name[kind, name]
+
+    def clear(self):
+        with self._lock:
+            self._by_id.clear()
+            self._by_name.clear()
+
+
+identity_map = IdentityMap()
+"""Shared by every repository in the process."""
@@ -0,0 +1,101 @@
+"""The level curve of skills.
+
+Each level needs `NEXT_LEVEL_REQUIRED_XP_FACTOR` times the xp of the previous
+one, rounded down. Instead of stepping level by level, I keep a table of the
+cumulative xp needed to gain each number of levels and search it.
+
+"""
+
+import bisect
+import functools
+from dataclasses import dataclass
+
+NEXT_LEVEL_REQUIRED_XP_FACTOR = 1.5
+MAIN_STAT_INCREASE = 2
+SECONDARY_STAT_INCREASE = 1
+
+
+@dataclass(frozen=True, slots=True)
+class LevelGain:
+    """The result of a number of xp on a skill.
+
+    :ivar levels: Levels gained.
+    :ivar xp: The xp left towards the next level.
+    :ivar xp_to_next_level: The xp the next level needs.
+
+    """
+
+    levels: int
+    xp: int
+    xp_to_next_level: int
+
+    @property
+    def main_stat_increase(self) -> int:
+        return self.levels * MAIN_STAT_INCREASE
+
+    @property
+    def secondary_stat_increase(self) -> int:
+        return self.levels * SECONDARY_STAT_INCREASE
+
+
+class LevelCurve:
+    """I represent the levels ahead of a skill whose next level needs
+    `first_requirement` xp.
+
+    My table grows as larger amounts of xp are asked for. It grows
+    geometrically, so it stays short.
+
+    """
+
+    def __init__(self, first_requirement: int) -> None:
+        if first_requirement < 2:
+            raise ValueError(  # noqa: TRY003  Explains the bad argument.
+                "A level must require 2 xp or more to grow."
+            )
+
+        # _requirements[n]: xp needed by the level n levels ahead.
+        # _thresholds[n]: xp needed to gain n levels.
+        self._requirements = [first_requirement]
+        self._thresholds = [0, first_requirement]
+
+    def _extend_to(self, xp: int):
+        while self._thresholds[-1] <= xp:
+            requirement = int(self._requirements[-1] * NEXT_LEVEL_REQUIRED_XP_FACTOR)
+            self._requirements.append(requirement)
+            self._thresholds.append(self._thresholds[-1] + requirement)
+
+    def xp_for(self, levels: int) -> int:
+        """The xp needed to gain `levels` levels."""
+        while len(self._thresholds) <= levels:
+            self._extend_to(self._thresholds[-1])
+        return self._thresholds[levels]
+
+    def gain(self, xp: int) -> LevelGain:
+        """The levels gained by a skill holding `xp` towards its next level."""
+        if xp < self._requirements[0]:
+            return LevelGain(levels=0, xp=xp, xp_to_next_level=self._requirements[0])
+
+        self._extend_to(xp)
+        levels = bisect.bisect_right(self._thresholds, xp) - 1
+
+        return LevelGain(
+            levels=levels,
+            xp=xp - self._thresholds[levels],
+            xp_to_next_level=self._requirements[levels],
+        )
+
+
+@functools.cache
+def level_curve(first_requirement: int) -> LevelCurve:
+    """The shared curve for skills whose next level needs `first_requirement`."""
+    return LevelCurve(first_requirement)
+
+
+def add_xp(xp: int, xp_to_next_level: int, xp_earned: int) -> LevelGain:
+    """The result of adding `xp_earned` to a skill holding `xp` towards a
+    level that needs `xp_to_next_level`."""
+    xp += xp_earned
+    if xp < xp_to_next_level:
+        return LevelGain(levels=0, xp=xp, xp_to_next_level=xp_to_next_level)
+
+    return level_curve(xp_to_next_level).gain(xp)
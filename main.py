@@ -8,20 +8,38 @@ Rest!
 
 """
 
+from __future__ import annotations
+
 import asyncio
-import os
-import platform
+import logging
 from dataclasses import dataclass
-from services import GoalsService
+from typing import TYPE_CHECKING
 
 import toga
+from toga.sources import ListSource
 from toga.style.pack import CENTER, COLUMN, ROW, Pack
 
-from domain import Goal
 from enums import Difficulty
-from focus import Focus
-from signals import goal_added, level_gained, xp_gained
-from timer import duration_from_seconds
+from events import EventBus, SkillChange
+from focus import Focus, GoalsPager
+from notifications import BreakNotifier
+from scheduling import Wakeup, next_wakeup
+from signals import goal_added, skills_changed, write_failed
+from views import TimerView
+from writer import BackgroundWriter
+
+if TYPE_CHECKING:
+    from domain import Goal
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SkillBox:
+    skill_label: toga.Label
+    xp_label: toga.Label
+    next_level_label: toga.Label
+    stats_label: toga.Label
 
 
 class NewGoalDialog(toga.Window):
@@ -80,87 +98,137 @@ class NewGoalDialog(toga.Window):
 class FocusApp(toga.App):
     def __init__(self, name: str, *args, **kwargs):
         super().__init__(name, *args, **kwargs)
-        self.focus_app = Focus()
+        # Hydrated once the window shows. See `_hydrate`.
+        self.focus_app = Focus(writer=BackgroundWriter(), hydrate=False)
         self._counting_task: asyncio.Task | None = None
+        self._hydrating_task: asyncio.Task | None = None
+        self._wakeup = Wakeup()
 
-        level_gained.connect(self.level_gained)
-        xp_gained.connect(self.xp_gained)
+        self.events: EventBus | None = None
+        # Filled by `_hydrate`.
+        self.skills: dict[str, SkillBox] = {}
+        self.stats: dict[str, toga.Label] = {}
+        skills_changed.connect(self.skills_changed)
         goal_added.connect(self.goal_added)
+        write_failed.connect(self.write_failed)
+
+        self.break_notifier = BreakNotifier()
+
+    def skills_changed(self, sender, changes: list[SkillChange]):
+        """Update the labels of the skills that changed, once per frame."""
+        for change in changes:
+            skill = change.skill
+            box = self.skills.get(skill.name)
+            if box is None:
+                # Changed while hydrating, before its box was created. The box
+                # shows the new values.
+                continue
+            box.xp_label.text = f"XP: {skill.xp} "
 
-        self.notified = False
-        "Notify when break time runs out. Only once."
+            if not change.levels:
+                continue
 
-    def level_gained(self, skill):
-        box = self.skills[skill.name]
-        box.xp_label.text = f"XP: {skill.xp} "
-        box.next_level_label.text = f"XP to next level: {skill.xp_to_next_level}"
+            box.skill_label.text = f"{skill.name.title()}: {skill.level}"
+            box.next_level_label.text = f"XP to next level: {skill.xp_to_next_level}"
 
-        main_stat_label = self.stats[skill.main_stat.name]
-        main_stat_label.text = (
-            f"{skill.main_stat.name.title()}: {skill.main_stat.value}"
-        )
+            for stat in (skill.main_stat, skill.secondary_stat):
+                if stat and stat.name in self.stats:
+                    self.stats[stat.name].text = f"{stat.name.title()}: {stat.value}"
 
-        if skill.secondary_stat:
-            secondary_stat_label = self.stats[skill.main_stat.name]
-            secondary_stat_label.text = (
-                f"{skill.secondary_stat.name.title()}: {skill.secondary_stat.value}"
-            )
+    def goal_added(self, goal: Goal):
+        self._add_goal_rows(self._incomplete_goal_rows, [goal])
 
-    def xp_gained(self, skill, xp_earned):
-        """Update xp label."""
-        print("Updating xp label", skill.name, xp_earned, skill)
-        box = self.skills[skill.name]
-        box = self.skills[skill.name]
-        box.xp_label.text = f"XP: {skill.xp} "
+    def write_failed(self, sender, count: int):
+        """Sent from the writer thread. The dialog is shown from the loop."""
+        self.loop.call_soon_threadsafe(self._show_write_error, count)
 
-    def goal_added(self, goal: Goal):
-        goal_box = self._create_goal_box(goal)
-        self.goals_box.add(goal_box)
+    def _show_write_error(self, count: int):
+        self.main_window.error_dialog(
+            "Could not save",
+            f"{count} changes could not be saved. They will be tried again.",
+        )
 
-    def goal_completed(self, goal: Goal, label, widget):
-        label.enabled = False
-        widget.enabled = False
+    async def complete_selected_goal(self, widget):
+        row = self.goals_table.selection
+        if row is None or self.goals_table.data is not self._incomplete_goal_rows:
+            return
 
-        if goal.completed:
-            widget.value = True
+        try:
+            await self.focus_app.complete_goal_async(row.goal_id)
+        except Exception as error:
+            logger.exception("Could not complete goal %d", row.goal_id)
+            self.main_window.error_dialog(
+                "Could not complete the goal", f"Try again later: {error}"
+            )
             return
 
-        GoalsService().complete_goal(goal.id)
+        self._incomplete_goal_rows.remove(row)
+        self._shown_goal_ids.discard(row.goal_id)
+
+        # Otherwise it's in a page still to be loaded.
+        if self._completed_goals is not None and self._completed_goals.loaded(
+            row.goal_id
+        ):
+            self._add_goal_rows(
+                self._completed_goal_rows, [self.focus_app.goals[row.goal_id]]
+            )
+
+    def exit_handler(self, app, **kwargs) -> bool:
+        """Write what's still pending before the app exits."""
+        self.events.close()
+        self.break_notifier.cancel()
+        self.focus_app.close()
+        return True
 
     def startup(self) -> None:
+        self.on_exit = self.exit_handler
+        self.events = EventBus(schedule=self.loop.call_soon_threadsafe)
         self.main_window = toga.Window()
 
         self._create_timer_box()
-        self._create_goals_box()
-        self._create_stats_box()
-        self._create_skills_box()
-
-        self.tabs_container = toga.OptionContainer(
-            content=[
-                ("Timer", self.timer_box),
-                ("Stats", self.stats_box),
-                ("Skills", self.skills_box),
-                ("Goals", self.goals_box),
-            ]
-        )
+        self.tabs_container = toga.OptionContainer(content=[("Timer", self.timer_box)])
 
         self.main_window.content = self.tabs_container
+        self.main_window.on_show = lambda window, **kwargs: self._wakeup.wake()
         self.main_window.show()
 
         self._counting_task = asyncio.create_task(self._update_timers())
+        self._hydrating_task = asyncio.create_task(self._hydrate())
+
+    async def _hydrate(self):
+        """Load stats, skills and goals after the timer is on screen, and add
+        the tabs showing them.
+
+        If loading fails, the timer keeps working without them.
+
+        """
+        try:
+            await self.focus_app.hydrate_async()
+        except Exception as error:
+            logger.exception("Could not load the database")
+            self.main_window.error_dialog(
+                "Could not load your data",
+                f"Stats, skills and goals are not available: {error}",
+            )
+            return
 
-    def _create_skills_box(self):
-        @dataclass
-        class SkillBox:
-            skill_label: toga.Label
-            xp_label: toga.Label
-            next_level_label: toga.Label
-            stats_label: toga.Label
+        self._create_stats_box()
+        self._create_skills_box()
+        self._create_goals_box()
+        self.tabs_container.content.append("Stats", self.stats_box)
+        self.tabs_container.content.append("Skills", self.skills_box)
+        self.tabs_container.content.append("Goals", self.goals_box)
+
+        skills = [skill.name.title() for skill in self.focus_app.new_skills.values()]
+        self.skill_selection.items = skills
+        if skills:
+            self.skill_selection.value = skills[0]
 
+    def _create_skills_box(self):
         self.skills_box = toga.Box(
             style=Pack(direction=COLUMN, alignment=CENTER, padding=10)
         )
-        self.skills: dict[str, SkillBox] = {}
+        self.skills = {}
 
         for skill in self.focus_app.new_skills.values():
             skill_label = toga.Label(f"{skill.name.title()}: {skill.level}")
@@ -192,7 +260,7 @@ class FocusApp(toga.App):
         self.stats_box = toga.Box(
             style=Pack(direction=COLUMN, alignment=CENTER, padding=10)
         )
-        self.stats: dict[str, toga.Label] = {}
+        self.stats = {}
 
         for stat in self.focus_app.stats.values():
             stat_label = toga.Label(f"{stat.name.title()}: {stat.value}")
@@ -201,73 +269,96 @@ class FocusApp(toga.App):
             self.stats[stat.name] = stat_label
 
     def _create_goals_box(self):
-        self.goals = {}
+        """A table of the incomplete goals, loaded a page at a time.
+        Completed goals are only loaded when asked for."""
         self.goals_box = toga.Box(style=Pack(direction=COLUMN, padding=10))
 
-        button_box = toga.Box(
-            style=Pack(direction=COLUMN, alignment=CENTER, padding=10)
-        )
+        button_box = toga.Box(style=Pack(direction=ROW, alignment=CENTER, padding=10))
         self.add_goal_button = toga.Button(
             "New goal",
             on_press=self.add_goal,
             style=Pack(padding=10, alignment=CENTER),
         )
+        self.complete_goal_button = toga.Button(
+            "Complete",
+            on_press=self.complete_selected_goal,
+            style=Pack(padding=10, alignment=CENTER),
+        )
+        self.more_goals_button = toga.Button(
+            "Load more",
+            on_press=self.load_more_goals,
+            style=Pack(padding=10, alignment=CENTER),
+        )
+        self.show_completed_switch = toga.Switch(
+            "Show completed",
+            on_change=self.toggle_completed_goals,
+            style=Pack(padding=10),
+        )
         button_box.add(self.add_goal_button)
+        button_box.add(self.complete_goal_button)
+        button_box.add(self.more_goals_button)
+        button_box.add(self.show_completed_switch)
 
         self.goals_box.add(button_box)
         self.goals_box.add(toga.Divider())
 
-        for goal in self.focus_app.goals.values():
-            if goal.completed:
-                continue
-
-            goal_box = self._create_goal_box(goal)
-            self.goals_box.add(goal_box)
-
-    def _create_goal_box(self, goal: Goal):
-        goal_box = toga.Box(style=Pack(direction=ROW, padding=10))
-        label = toga.Label(
-            goal.title,
-            style=Pack(direction=COLUMN, padding=10, flex=20),
+        accessors = ["title", "difficulty", "skill"]
+        self._incomplete_goal_rows = ListSource(accessors=accessors, data=[])
+        self._completed_goal_rows = ListSource(accessors=accessors, data=[])
+        self._completed_goals: GoalsPager | None = None
+        self._shown_goal_ids: set[int] = set()
+
+        self.goals_table = toga.Table(
+            headings=["Goal", "Difficulty", "Skill"],
+            accessors=accessors,
+            data=self._incomplete_goal_rows,
+            style=Pack(flex=1),
         )
-        goal_box.add(label)
+        self.goals_box.add(self.goals_table)
 
-        dif_label = toga.Label(
-            goal.difficulty,
-            style=Pack(direction=COLUMN, padding=10, flex=20),
+        # The first page was loaded by `Focus`.
+        self._add_goal_rows(
+            self._incomplete_goal_rows,
+            [goal for goal in self.focus_app.goals.values() if not goal.completed],
         )
+        self.more_goals_button.enabled = not self.focus_app.incomplete_goals.exhausted
 
-        goal_box.add(dif_label)
+    def _add_goal_rows(self, rows: ListSource, goals: list[Goal]):
+        for goal in goals:
+            if goal.id in self._shown_goal_ids:
+                continue
 
-        skill = self.focus_app.new_skills[goal.main_skill.name]
+            self._shown_goal_ids.add(goal.id)
+            rows.append(
+                {
+                    "title": goal.title,
+                    "difficulty": goal.difficulty,
+                    "skill": goal.main_skill.name,
+                    "goal_id": goal.id,
+                }
+            )
 
-        skill_label = toga.Label(
-            skill.name,
-            style=Pack(direction=COLUMN, padding=10, flex=20),
-        )
+    def _current_goals_pager(self) -> GoalsPager:
+        if self.goals_table.data is self._completed_goal_rows:
+            return self._completed_goals
+        return self.focus_app.incomplete_goals
 
-        goal_box.add(skill_label)
-
-        def _goal_completed(widget):
-            self.focus_app.complete_goal(goal.id)
-            self.goal_completed(goal, label, widget)
-            widget.enabled = False
-            label.enabled = False
-
-        completed_box = toga.Box(
-            style=Pack(direction=COLUMN),
-            children=[
-                toga.Switch(
-                    "Completed",
-                    value=goal.completed,
-                    on_change=_goal_completed,
-                    style=Pack(padding=10, flex=33),
-                )
-            ],
-        )
-        goal_box.add(completed_box)
+    def load_more_goals(self, widget):
+        pager = self._current_goals_pager()
+        self._add_goal_rows(self.goals_table.data, pager.next_page())
+        self.more_goals_button.enabled = not pager.exhausted
+
+    def toggle_completed_goals(self, widget):
+        if not widget.value:
+            self.goals_table.data = self._incomplete_goal_rows
+        else:
+            self.goals_table.data = self._completed_goal_rows
+            if self._completed_goals is None:
+                self._completed_goals = GoalsPager(self.focus_app, completed=True)
+                self.load_more_goals(widget)
 
-        return goal_box
+        self.complete_goal_button.enabled = not widget.value
+        self.more_goals_button.enabled = not self._current_goals_pager().exhausted
 
     def _create_timer_box(self):
         self.timer_box = toga.Box(
@@ -307,14 +398,10 @@ class FocusApp(toga.App):
             style=Pack(direction=COLUMN, alignment=CENTER, padding=10)
         )
 
-        skills: list[str] = [
-            skill.name.title() for skill in self.focus_app.new_skills.values()
-        ]
+        # Filled in by `_hydrate`.
         self.skill_selection = toga.Selection(
-            items=skills, on_change=self.change_selected_skill
+            items=[], on_change=self.change_selected_skill
         )
-
-        self.skill_selection.value = skills[0]
         self.skills_selection_box.add(self.skill_selection)
 
         self.timer_box.add(self.skills_selection_box)
@@ -332,7 +419,17 @@ class FocusApp(toga.App):
         )
         self.timer_box.add(self.earned_break_time_label)
 
+        self.timer_view = TimerView(
+            timer_label=self.timer_label,
+            total_focused_label=self.total_focused_time_label,
+            total_rested_label=self.total_break_time_label,
+            earned_break_label=self.earned_break_time_label,
+        )
+
     def change_selected_skill(self, widget):
+        if widget.value is None:
+            return
+
         if not self.focus_app.set_current_skill(widget.value.lower()):
             widget.value = self.focus_app.current_skill.name.title()
 
@@ -343,7 +440,9 @@ class FocusApp(toga.App):
         result = await dialog
 
         if result == "Save":
-            self.focus_app.add_goal(
+            from domain import Goal
+
+            await self.focus_app.add_goal_async(
                 Goal(
                     title=dialog.title_input.value,
                     description=dialog.description_input.value,
@@ -357,72 +456,40 @@ class FocusApp(toga.App):
             self.focus_app.unpause()
         else:
             self.focus_app.pause()
+        self._timers_changed()
 
     def toggle_timers(self, widget) -> None:
         if not self.focus_app.started or self.focus_app.resting:
             self.focus_app.focus()
-            self.earned_break_time_label.text = (
-                f"Earned break time: {self.focus_app.earned_break_time // 60} minutes"
-            )
             self.start_button.text = "Break"
-
-            if self.focus_app.earned_break_time < 0:
-                self.timer_label.style.color = "red"
         else:
-            self.notified = False
             self._enter_break()
+        self._timers_changed()
+
+    def _timers_changed(self):
+        self.break_notifier.reschedule(self.focus_app.snapshot())
+        self._wakeup.wake()
 
     def _enter_break(self):
         self.focus_app.rest()
-
-        self.total_focused_time_label.text = f"Total focused time: {duration_from_seconds(self.focus_app.get_total_focused_seconds())}"
-        self.earned_break_time_label.text = (
-            f"Earned break time: {self.focus_app.earned_break_time // 60} minutes"
-        )
-        self.total_break_time_label.text = f"Total break time: {duration_from_seconds(self.focus_app.get_total_rested_seconds())}"
         self.start_button.text = "Focus!"
 
     async def _update_timers(self):
-        """Updates the timer labels every second."""
+        """Updates the timer labels when what they show changes.
+
+        `timer_view` only pushes what changed. Sleeps until the next deadline
+        from `next_wakeup`, or until woken by `_wakeup`, e.g. when the window
+        shows. While hidden it doesn't wake on its own.
+
+        """
         while True:
-            if self.focus_app.paused:
-                await asyncio.sleep(1)
-                continue
+            snapshot = self.focus_app.snapshot()
+            visible = self.main_window.visible
 
-            minutes, seconds = duration_from_seconds(
-                self.focus_app.get_current_clock_time()
-            )
-            current_break_time = 0
-            if self.focus_app.focusing:
-                self.timer_label.style.color = "black"
-                self.earned_break_time_label.text = f"Earned break time: {(self.focus_app.earned_break_time + self.focus_app.get_current_clock_time() // self.focus_app.focus_break_ratio) // 60} minutes"
-                self.timer_label.text = str(
-                    duration_from_seconds(self.focus_app.get_current_clock_time())
-                )
-                self.total_focused_time_label.text = f"Total focused time: {duration_from_seconds(self.focus_app.get_total_focused_seconds())}"
-            else:
-                current_break_time += self.focus_app.get_current_clock_time()
+            if visible and not snapshot.paused:
+                self.timer_view.render(snapshot)
 
-                self.earned_break_time_label.text = f"Earned break time: {(self.focus_app.earned_break_time - self.focus_app.get_current_clock_time()) // 60} minutes"
-                self.timer_label.text = str(
-                    duration_from_seconds(self.focus_app.get_current_clock_time())
-                )
-                self.total_break_time_label.text = f"Total break time: {duration_from_seconds(self.focus_app.get_total_rested_seconds())}"
-
-            if (self.focus_app.earned_break_time - current_break_time) < 0:
-                if self.focus_app.resting:
-                    self.timer_label.style.color = "red"
-                    if not self.notified and platform.system() == "Linux":
-                        self.notified = True
-                        os.system('/usr/bin/notify-send -t 2000 "Run out of break time"')
-                else:
-                    self.timer_label.style.color = "black"
-                self.total_break_time_label.color = "red"
-            else:
-                self.timer_label.style.color = "black"
-                self.total_break_time_label.color = "black"
-
-            await asyncio.sleep(1)
+            await self._wakeup.sleep(next_wakeup(snapshot, visible=visible))
 
 
 def main():
@@ -1,4 +1,6 @@
-from sqlmodel import Field, Relationship
+import datetime as dt
+
+from sqlmodel import Field, Relationship, SQLModel
 
 from domain import GoalBase, SkillBase, StatBase
 
@@ -37,3 +39,14 @@ class GoalModel(GoalBase, table=True):
     secondary_skill: SkillModel = Relationship(
         sa_relationship_kwargs=dict(foreign_keys="[GoalModel.secondary_skill_id]")
     )
+
+
+class XpEventModel(SQLModel, table=True):
+    """One grant of xp to a skill. Rows are only ever appended; skills and
+    stats can be rebuilt from them with `replay`."""
+
+    id: int | None = Field(default=None, primary_key=True)
+
+    skill_id: int = Field(foreign_key="skillmodel.id", index=True)
+    xp: int
+    created_at: dt.datetime = Field(default_factory=lambda: dt.datetime.now(dt.UTC))
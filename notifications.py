@@ -0,0 +1,126 @@
+"""Desktop notifications, sent without blocking the event loop."""
+
+import asyncio
+import logging
+import platform
+import shutil
+from collections.abc import Callable
+from typing import Protocol
+
+from focus import TickSnapshot
+from scheduling import seconds_until_break_exhausted
+
+logger = logging.getLogger(__name__)
+
+BREAK_EXHAUSTED_MESSAGE = "Run out of break time"
+
+CallLater = Callable[[float, Callable[[], None]], asyncio.Handle]
+"""Like `asyncio.AbstractEventLoop.call_later`, without arguments."""
+
+
+class NotificationBackend(Protocol):
+    async def notify(self, message: str): ...
+
+
+class NotifySendBackend:
+    """I show notifications with `notify-send`, in a subprocess of its own."""
+
+    def __init__(self, executable: str, timeout_ms: int = 2000) -> None:
+        self.executable = executable
+        self.timeout_ms = timeout_ms
+
+    async def notify(self, message: str):
+        process = await asyncio.create_subprocess_exec(
+            self.executable, "-t", str(self.timeout_ms), message
+        )
+        await process.wait()
+
+
+class NullBackend:
+    """I drop notifications, where there's no way to show them."""
+
+    async def notify(self, message: str):
+        pass
+
+
+class RecordingBackend:
+    """I keep notifications in `messages`. For tests."""
+
+    def __init__(self) -> None:
+        self.messages: list[str] = []
+
+    async def notify(self, message: str):
+        self.messages.append(message)
+
+
+def default_backend() -> NotificationBackend:
+    executable = shutil.which("notify-send")
+    if platform.system() == "Linux" and executable:
+        return NotifySendBackend(executable)
+
+    return NullBackend()
+
+
+class BreakNotifier:
+    """I notify once when the break time runs out.
+
+    Instead of checking every tick, I schedule a single callback for the
+    moment it happens. Call `reschedule` whenever the timers change state,
+    e.g. on focus, rest, pause and unpause.
+
+    :ivar call_later: Schedules the callback. The running loop's `call_later`
+        by default.
+
+    """
+
+    def __init__(
+        self,
+        backend: NotificationBackend | None = None,
+        *,
+        call_later: CallLater | None = None,
+    ) -> None:
+        self.backend = backend or default_backend()
+        self.call_later = call_later
+        self._handle: asyncio.Handle | None = None
+        self._notified = False
+        self._tasks: set[asyncio.Task] = set()
+
+    def reschedule(self, snapshot: TickSnapshot):
+        """Schedule the notification from `snapshot`. Focusing again means
+        the next break will be notified too."""
+        self.cancel()
+
+        if snapshot.focusing:
+            self._notified = False
+        if self._notified or not snapshot.resting:
+            return
+
+        delay = seconds_until_break_exhausted(snapshot)
+        if delay is None:
+            # It's already exhausted.
+            delay = 0
+        call_later = self.call_later or asyncio.get_running_loop().call_later
+        self._handle = call_later(delay, self._notify)
+
+    def cancel(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def _notify(self):
+        self._handle = None
+        self._notified = True
+
+        task = asyncio.create_task(self._send(BREAK_EXHAUSTED_MESSAGE))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, message: str):
+        try:
+            await self.backend.notify(message)
+        except Exception:
+            logger.exception("Could not notify %r", message)
+
+    async def drain(self):
+        """Wait for the notifications being sent."""
+        await asyncio.gather(*self._tasks)
@@ -0,0 +1,152 @@
+"""Rebuild skills and stats from the xp event log.
+
+Levels and stat values are derived from the xp each skill earned, so after a
+change to the level curve they can be recomputed with::
+
+    python replay.py replay [db_name]
+
+Skills earned xp before the log existed. Run `seed` once to log it first.
+
+"""
+
+import itertools
+from dataclasses import dataclass
+
+from sqlalchemy import update
+from sqlmodel import select
+
+import db
+from domain import SkillBase, StatBase
+from identity import identity_map
+from levels import (
+    MAIN_STAT_INCREASE,
+    SECONDARY_STAT_INCREASE,
+    add_xp,
+    level_curve,
+)
+from models import SkillModel, StatModel, XpEventModel
+
+_INITIAL_LEVEL = SkillBase.model_fields["level"].default
+_INITIAL_XP = SkillBase.model_fields["xp"].default
+_INITIAL_XP_TO_NEXT_LEVEL = SkillBase.model_fields["xp_to_next_level"].default
+_INITIAL_STAT_VALUE = StatBase.model_fields["value"].default
+
+
+@dataclass(slots=True)
+class _SkillState:
+    main_stat_id: int
+    secondary_stat_id: int | None
+    level: int = _INITIAL_LEVEL
+    xp: int = _INITIAL_XP
+    xp_to_next_level: int = _INITIAL_XP_TO_NEXT_LEVEL
+
+
+def replay(batch_size: int = 10_000) -> int:
+    """Recompute every skill and stat from the xp event log.
+
+    Events are streamed once, in the order they were logged. The results are
+    written `batch_size` rows at a time, all in a single transaction.
+
+    :return: The number of events replayed.
+
+    """
+    with db.UnitOfWork() as unit_of_work:
+        session = unit_of_work.session
+
+        skills = {
+            id: _SkillState(main_stat_id, secondary_stat_id)
+            for id, main_stat_id, secondary_stat_id in session.exec(
+                select(
+                    SkillModel.id,
+                    SkillModel.main_stat_id,
+                    SkillModel.secondary_stat_id,
+                )
+            )
+        }
+
+        count = 0
+        events = session.exec(
+            select(XpEventModel.skill_id, XpEventModel.xp)
+            .order_by(XpEventModel.id)
+            .execution_options(yield_per=batch_size)
+        )
+        for skill_id, xp in events:
+            skill = skills[skill_id]
+            gain = add_xp(skill.xp, skill.xp_to_next_level, xp)
+            skill.level += gain.levels
+            skill.xp = gain.xp
+            skill.xp_to_next_level = gain.xp_to_next_level
+            count += 1
+
+        stats = dict.fromkeys(session.exec(select(StatModel.id)), _INITIAL_STAT_VALUE)
+        for skill in skills.values():
+            levels = skill.level - _INITIAL_LEVEL
+            stats[skill.main_stat_id] += levels * MAIN_STAT_INCREASE
+            if skill.secondary_stat_id is not None:
+                stats[skill.secondary_stat_id] += levels * SECONDARY_STAT_INCREASE
+
+        skill_rows = (
+            {
+                "id": id,
+                "level": skill.level,
+                "xp": skill.xp,
+                "xp_to_next_level": skill.xp_to_next_level,
+            }
+            for id, skill in skills.items()
+        )
+        for batch in itertools.batched(skill_rows, batch_size, strict=False):
+            session.execute(update(SkillModel), list(batch))
+
+        stat_rows = ({"id": id, "value": value} for id, value in stats.items())
+        for batch in itertools.batched(stat_rows, batch_size, strict=False):
+            session.execute(update(StatModel), list(batch))
+
+    # The objects in memory hold the old values.
+    identity_map.clear()
+
+    return count
+
+
+def seed() -> int:
+    """Log the xp of skills without any event, so `replay` keeps it.
+
+    :return: The number of events logged.
+
+    """
+    with db.UnitOfWork() as unit_of_work:
+        session = unit_of_work.session
+
+        logged = select(XpEventModel.skill_id).distinct()
+        skills = session.exec(
+            select(SkillModel.id, SkillModel.level, SkillModel.xp).where(
+                SkillModel.id.not_in(logged)
+            )
+        ).all()
+
+        curve = level_curve(_INITIAL_XP_TO_NEXT_LEVEL)
+        events = [
+            XpEventModel(skill_id=id, xp=curve.xp_for(level - _INITIAL_LEVEL) + xp)
+            for id, level, xp in skills
+            if level != _INITIAL_LEVEL or xp != _INITIAL_XP
+        ]
+        session.add_all(events)
+
+    return len(events)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rebuild skills from xp events.")
+    parser.add_argument("command", choices=["replay", "seed"])
+    parser.add_argument("db_name", nargs="?")
+    args = parser.parse_args()
+
+    if args.db_name:
+        db.configure(db.sqlite_url(args.db_name))
+    db.create_db_and_tables()
+
+    if args.command == "seed":
+        print("Logged", seed(), "events")  # noqa: T201
+    else:
+        print("Replayed", replay(), "events")  # noqa: T201
@@ -1,10 +1,98 @@
 from collections.abc import Iterable
+from typing import Self
 
+from sqlalchemy.orm import joinedload
 from sqlmodel import Session, SQLModel, select
 
-from db import get_session
+from db import get_session, get_unit_of_work
 from domain import Goal, Skill, Stat
-from models import GoalModel, SkillModel, StatModel
+from identity import identity_map
+from models import GoalModel, SkillModel, StatModel, XpEventModel
+
+# Joined loading, so validating the domain objects doesn't lazy load each
+# relationship with a query of its own.
+_SKILL_GRAPH = (
+    joinedload(SkillModel.main_stat),
+    joinedload(SkillModel.secondary_stat),
+)
+
+
+def _load_skill_graph(relationship):
+    """Load `relationship` to a skill, and its stats, in the same query."""
+    return joinedload(relationship).options(*_SKILL_GRAPH)
+
+
+_GOAL_GRAPH = (
+    _load_skill_graph(GoalModel.main_skill),
+    _load_skill_graph(GoalModel.secondary_skill),
+)
+
+
+def _to_stat(model: StatModel) -> Stat:
+    return identity_map.get(Stat, model.id) or identity_map.add(
+        Stat.model_validate(model)
+    )
+
+
+def _to_skill(model: SkillModel) -> Skill:
+    skill = identity_map.get(Skill, model.id)
+    if skill is not None:
+        return skill
+
+    return identity_map.add(
+        Skill(
+            id=model.id,
+            name=model.name,
+            level=model.level,
+            xp=model.xp,
+            xp_to_next_level=model.xp_to_next_level,
+            main_stat=_to_stat(model.main_stat),
+            secondary_stat=_to_stat(model.secondary_stat)
+            if model.secondary_stat
+            else None,
+        )
+    )
+
+
+def _to_goal(model: GoalModel) -> Goal:
+    goal = identity_map.get(Goal, model.id)
+    if goal is not None:
+        return goal
+
+    return identity_map.add(
+        Goal(
+            id=model.id,
+            title=model.title,
+            description=model.description,
+            difficulty=model.difficulty,
+            completed=model.completed,
+            main_skill=_to_skill(model.main_skill),
+            secondary_skill=_to_skill(model.secondary_skill)
+            if model.secondary_skill
+            else None,
+        )
+    )
+
+
+def _touch(kind: type, id: int):
+    """Have the active `UnitOfWork` invalidate the row if it rolls back."""
+    unit_of_work = get_unit_of_work()
+    if unit_of_work is not None:
+        unit_of_work.touch(kind, id)
+
+
+def _write_through(kind: type, id: int, fields: dict):
+    """Apply `fields` to the in-memory object for the row, if there's one."""
+    _touch(kind, id)
+    obj = identity_map.get(kind, id)
+    if obj is None:
+        return
+
+    if "name" in fields:
+        identity_map.invalidate(kind, id)
+    for field, value in fields.items():
+        setattr(obj, field, value)
+    identity_map.add(obj)
 
 
 class StatUpdate(SQLModel):
@@ -31,9 +119,40 @@ class GoalUpdate(SQLModel):
 
 
 class BaseRepository:
+    """Inside a `UnitOfWork` I use its session, which it closes.
+
+    Otherwise I open a session of my own, unless given one. Use me in a
+    `with` block, or call `close`, so its connection goes back to the pool.
+
+    """
+
     def __init__(self, session: Session | None = None):
+        unit_of_work = get_unit_of_work()
+        if session is None and unit_of_work is not None:
+            session = unit_of_work.session
+
+        self._owns_session = session is None
         self.session = session or get_session()
 
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Close my session, if I opened it."""
+        if self._owns_session:
+            self.session.close()
+
+    def _commit(self):
+        """Commit, or only flush when part of a `UnitOfWork`."""
+        unit_of_work = get_unit_of_work()
+        if unit_of_work is not None and unit_of_work.session is self.session:
+            self.session.flush()
+        else:
+            self.session.commit()
+
 
 class SkillRepository(BaseRepository):
     def create_skill(self, skill: Skill) -> Skill:
@@ -58,7 +177,8 @@ class SkillRepository(BaseRepository):
             main_stat = StatsRepository(session=self.session).create_stat(
                 skill.main_stat
             )
-            skill_args["main_stat_id"] = main_stat.id
+        skill_args["main_stat_id"] = main_stat.id
+        skill.main_stat = main_stat
 
         secondary_stat = None
         if skill.secondary_stat:
@@ -69,50 +189,66 @@ class SkillRepository(BaseRepository):
                 secondary_stat = StatsRepository(session=self.session).create_stat(
                     skill.secondary_stat
                 )
-                skill_args["secondary_stat_id"] = secondary_stat.id
+            skill_args["secondary_stat_id"] = secondary_stat.id
+            skill.secondary_stat = secondary_stat
 
         skill_model = SkillModel(**skill_args)
 
         self.session.add(skill_model)
-        self.session.commit()
+        self._commit()
 
         skill.id = skill_model.id
+        _touch(Skill, skill.id)
 
-        return skill
+        return identity_map.add(skill)
 
     def get_skill_by_name(self, name: str) -> Skill | None:
         """Retrieve a skill by name."""
+        skill = identity_map.get_by_name(Skill, name.lower())
+        if skill is not None:
+            return skill
+
         skill = self.session.exec(
-            select(SkillModel).where(SkillModel.name == name.lower())
+            select(SkillModel)
+            .options(*_SKILL_GRAPH)
+            .where(SkillModel.name == name.lower())
         ).first()
         if skill:
-            return Skill.model_validate(skill)
+            return _to_skill(skill)
 
         return None
 
     def get_skill_by_id(self, id: int) -> Skill | None:
-        skill = self.session.exec(select(SkillModel).where(SkillModel.id == id)).first()
+        skill = identity_map.get(Skill, id)
+        if skill is not None:
+            return skill
+
+        skill = self.session.exec(
+            select(SkillModel).options(*_SKILL_GRAPH).where(SkillModel.id == id)
+        ).first()
 
         if skill:
-            return Skill.model_validate(skill)
+            return _to_skill(skill)
 
         return None
 
     def get_all_skills(self) -> Iterable[Skill]:
         """Return all skills."""
         return (
-            Skill.model_validate(skill)
-            for skill in self.session.exec(select(SkillModel)).all()
+            _to_skill(skill)
+            for skill in self.session.exec(
+                select(SkillModel).options(*_SKILL_GRAPH)
+            ).all()
         )
 
     def update_skill(self, *, update: SkillUpdate) -> Skill:
         skill_to_update = self.session.get(SkillModel, update.id)
 
         ignore = {"main_stat", "secondary_stat"}
-        for field, value in update.model_dump(exclude_unset=True).items():
-            if field in ignore:
-                continue
+        fields = update.model_dump(exclude_unset=True, exclude=ignore)
+        for field, value in fields.items():
             setattr(skill_to_update, field, value)
+        _write_through(Skill, update.id, fields)
 
         self.session.add(skill_to_update)
         if update.main_stat is not None:
@@ -124,9 +260,33 @@ class SkillRepository(BaseRepository):
                 update=StatUpdate.model_validate(update.secondary_stat)
             )
 
-        self.session.commit()
+        self._commit()
+
+        return _to_skill(skill_to_update)
+
+    def store_skill(self, snapshot: SkillUpdate):
+        """Store the level, xp and stats in `snapshot`.
 
-        return Skill.model_validate(skill_to_update)
+        Unlike `update_skill`, the in-memory skill is left alone: the snapshot
+        was taken from it, and it may have changed again since.
+
+        """
+        _touch(Skill, snapshot.id)
+        skill_model = self.session.get(SkillModel, snapshot.id)
+        skill_model.level = snapshot.level
+        skill_model.xp = snapshot.xp
+        skill_model.xp_to_next_level = snapshot.xp_to_next_level
+        self.session.add(skill_model)
+
+        for stat in (snapshot.main_stat, snapshot.secondary_stat):
+            if stat is None:
+                continue
+            _touch(Stat, stat.id)
+            stat_model = self.session.get(StatModel, stat.id)
+            stat_model.value = stat.value
+            self.session.add(stat_model)
+
+        self._commit()
 
 
 class StatsRepository(BaseRepository):
@@ -137,38 +297,42 @@ class StatsRepository(BaseRepository):
         """
         stat_model = StatModel.model_validate(stat)
         self.session.add(stat_model)
-        self.session.commit()
+        self._commit()
 
         stat.id = stat_model.id
+        _touch(Stat, stat.id)
 
-        return stat
+        return identity_map.add(stat)
 
     def get_stat_by_name(self, name: str) -> Stat | None:
+        stat = identity_map.get_by_name(Stat, name.lower())
+        if stat is not None:
+            return stat
+
         stat = self.session.exec(
             select(StatModel).where(StatModel.name == name.lower())
         ).first()
         if stat:
-            return Stat.model_validate(stat)
+            return _to_stat(stat)
 
         return None
 
     def get_all_stats(self) -> Iterable[Stat]:
         """Return all stats."""
-        return (
-            Stat.model_validate(stat)
-            for stat in self.session.exec(select(StatModel)).all()
-        )
+        return (_to_stat(stat) for stat in self.session.exec(select(StatModel)).all())
 
     def update_stat(self, *, update: StatUpdate) -> Stat:
         stat_to_update = self.session.get(StatModel, update.id)
 
-        for field, value in update.model_dump(exclude_unset=True).items():
+        fields = update.model_dump(exclude_unset=True)
+        for field, value in fields.items():
             setattr(stat_to_update, field, value)
+        _write_through(Stat, update.id, fields)
 
         self.session.add(stat_to_update)
-        self.session.commit()
+        self._commit()
 
-        return Stat.model_validate(stat_to_update)
+        return _to_stat(stat_to_update)
 
 
 class GoalsRepository(BaseRepository):
@@ -192,7 +356,8 @@ class GoalsRepository(BaseRepository):
             main_skill = SkillRepository(session=self.session).create_skill(
                 goal.main_skill
             )
-            goal_args["main_skill_id"] = main_skill.id
+        goal_args["main_skill_id"] = main_skill.id
+        goal.main_skill = main_skill
 
         secondary_skill = None
         if goal.secondary_skill:
@@ -203,38 +368,66 @@ class GoalsRepository(BaseRepository):
                 secondary_skill = SkillRepository(session=self.session).create_skill(
                     goal.secondary_skill
                 )
-                goal_args["secondary_skill_id"] = secondary_skill.id
+            goal_args["secondary_skill_id"] = secondary_skill.id
+            goal.secondary_skill = secondary_skill
 
         goal_model = GoalModel(**goal_args)
 
         self.session.add(goal_model)
-        self.session.commit()
+        self._commit()
 
         goal.id = goal_model.id
+        _touch(Goal, goal.id)
 
-        return goal
+        return identity_map.add(goal)
 
     def get_goal_by_id(self, id: int) -> Goal:
+        goal = identity_map.get(Goal, id)
+        if goal is not None:
+            return goal
+
         goal_model = self.session.exec(
-            select(GoalModel).where(GoalModel.id == id)
+            select(GoalModel).options(*_GOAL_GRAPH).where(GoalModel.id == id)
         ).first()
 
-        return Goal.model_validate(goal_model)
+        return _to_goal(goal_model)
 
     def get_all_goals(self) -> Iterable[Goal]:
         return (
-            Goal.model_validate(goal)
-            for goal in self.session.exec(select(GoalModel)).all()
+            _to_goal(goal)
+            for goal in self.session.exec(select(GoalModel).options(*_GOAL_GRAPH)).all()
+        )
+
+    def get_goals_page(
+        self, *, completed: bool = False, after_id: int | None = None, limit: int
+    ) -> list[Goal]:
+        """Up to `limit` goals, by id, after the goal with `after_id`.
+
+        Pages are keyed on the id, so each one is a seek on the `completed`
+        index however far in it is.
+
+        """
+        query = (
+            select(GoalModel)
+            .options(*_GOAL_GRAPH)
+            .where(GoalModel.completed == completed)
         )
+        if after_id is not None:
+            query = query.where(GoalModel.id > after_id)
+
+        return [
+            _to_goal(goal)
+            for goal in self.session.exec(query.order_by(GoalModel.id).limit(limit))
+        ]
 
     def update_goal(self, update: GoalUpdate) -> Goal:
         goal_to_update = self.session.get(GoalModel, update.id)
 
         ignore = {"main_skill", "secondary_skill"}
-        for field, value in update.model_dump(exclude_unset=True).items():
-            if field in ignore:
-                continue
+        fields = update.model_dump(exclude_unset=True, exclude=ignore)
+        for field, value in fields.items():
             setattr(goal_to_update, field, value)
+        _write_through(Goal, update.id, fields)
 
         self.session.add(goal_to_update)
         if update.main_skill is not None:
@@ -245,6 +438,38 @@ class GoalsRepository(BaseRepository):
             SkillRepository(session=self.session).update_skill(
                 update=SkillUpdate.model_validate(update.secondary_skill)
             )
-        self.session.commit()
+        self._commit()
+
+        return _to_goal(goal_to_update)
+
+    def store_completion(self, snapshot: GoalUpdate):
+        """Store `snapshot` of a completed goal, and of the skills it rewarded.
+
+        Like `SkillRepository.store_skill`, the in-memory objects are left
+        alone.
 
-        return Goal.model_validate(goal_to_update)
+        """
+        _touch(Goal, snapshot.id)
+        goal_model = self.session.get(GoalModel, snapshot.id)
+        goal_model.completed = snapshot.completed
+        self.session.add(goal_model)
+
+        for skill in (snapshot.main_skill, snapshot.secondary_skill):
+            if skill is not None:
+                SkillRepository(session=self.session).store_skill(skill)
+
+        self._commit()
+
+
+class XpEventRepository(BaseRepository):
+    def record_xp(self, skill_id: int, xp: int):
+        """Append a grant of `xp` to the skill to the event log."""
+        self.session.add(XpEventModel(skill_id=skill_id, xp=xp))
+        self._commit()
+
+    def record_rewards(self, goal: Goal):
+        """Append the xp granted by completing `goal` to the event log."""
+        self.session.add_all(
+            XpEventModel(skill_id=skill.id, xp=xp) for skill, xp in goal.rewards()
+        )
+        self._commit()
@@ -0,0 +1,68 @@
+"""When the timer labels need to be updated.
+
+Rather than polling every second, the UI sleeps until the next moment
+something it shows changes, and not at all while the timers don't run or
+the window is hidden.
+
+"""
+
+import asyncio
+import math
+
+from focus import TickSnapshot
+
+
+def seconds_until_break_exhausted(snapshot: TickSnapshot) -> float | None:
+    """Seconds until the break balance goes below zero, if it's going to."""
+    if not snapshot.resting or snapshot.break_exhausted:
+        return None
+
+    # The balance drops by one each time the clock counts a second.
+    return snapshot.until_next_second + snapshot.earned_break_time
+
+
+def next_wakeup(snapshot: TickSnapshot, *, visible: bool = True) -> float | None:
+    """Seconds until the UI has something to update after `snapshot`.
+
+    That's whenever the clock counts a second, which keeps wake ups aligned
+    with the timer's own second boundaries. Nothing is shown while hidden, so
+    there's nothing to update until the window shows again. The end of the
+    break is notified by `notifications.BreakNotifier`.
+
+    :return: `None` if nothing will change until the user does something,
+        or the window shows.
+
+    """
+    if not visible or snapshot.paused or math.isinf(snapshot.until_next_second):
+        return None
+
+    return snapshot.until_next_second
+
+
+class Wakeup:
+    """I let the timer loop sleep until its next deadline, or until something
+    else, like the user pressing a button, wakes it."""
+
+    def __init__(self) -> None:
+        self._event = asyncio.Event()
+
+    def wake(self):
+        self._event.set()
+
+    async def sleep(self, delay: float | None) -> bool:
+        """Sleep for `delay` seconds, or until woken if `None`.
+
+        :return: Whether I was woken before the delay was over.
+
+        """
+        try:
+            if delay is None:
+                await self._event.wait()
+            else:
+                await asyncio.wait_for(self._event.wait(), delay)
+        except TimeoutError:
+            return False
+        finally:
+            self._event.clear()
+
+        return True
@@ -4,3 +4,5 @@ goal_completed = signal("goal-completed")
 level_gained = signal("level-gained")
 xp_gained = signal("xp-gained")
 goal_added = signal("goal-added")
+skills_changed = signal("skills-changed")
+write_failed = signal("write-failed")
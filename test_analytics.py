@@ -0,0 +1,91 @@
+import datetime as dt
+
+import pytest
+
+import analytics
+from timer import Lapse, LapseStore, LapseType
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    """Run each test with NumPy, if installed, and with pure Python."""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(analytics, "np", None)
+
+    return request.param
+
+
+def _lapse(start: dt.datetime, minutes: int, type=LapseType.focus) -> Lapse:
+    return Lapse(start=start, end=start + dt.timedelta(minutes=minutes), type=type)
+
+
+@pytest.fixture
+def store() -> LapseStore:
+    monday = dt.datetime(2024, 1, 1, 9, tzinfo=dt.UTC)
+    day = dt.timedelta(days=1)
+
+    return LapseStore(
+        [
+            _lapse(monday, 25),
+            _lapse(monday + dt.timedelta(hours=1), 30),
+            _lapse(monday + dt.timedelta(hours=1, minutes=30), 10, LapseType.rest),
+            _lapse(monday + day, 20),
+            _lapse(monday + 2 * day + dt.timedelta(hours=5), 15),
+            _lapse(monday + 5 * day, 40),
+        ]
+    )
+
+
+def test_hourly_histogram(backend, store):
+    totals = analytics.hourly_histogram(store)
+
+    assert len(totals) == 24
+    assert totals[9] == (25 + 20 + 40) * 60
+    assert totals[10] == 30 * 60
+    assert totals[14] == 15 * 60
+    assert sum(totals) == 130 * 60
+
+    local = analytics.hourly_histogram(store, utc_offset=-3600)
+    assert local[8] == totals[9]
+
+
+def test_weekday_histogram(backend, store):
+    totals = analytics.weekday_histogram(store)
+
+    assert totals == [55 * 60, 20 * 60, 15 * 60, 0, 0, 40 * 60, 0]
+
+
+def test_daily_totals_and_streaks(backend, store):
+    days, totals = analytics.daily_totals(store)
+
+    assert days == [
+        dt.date(2024, 1, 1),
+        dt.date(2024, 1, 2),
+        dt.date(2024, 1, 3),
+        dt.date(2024, 1, 6),
+    ]
+    assert totals == [55 * 60, 20 * 60, 15 * 60, 40 * 60]
+
+    assert analytics.streaks(store) == [
+        (dt.date(2024, 1, 1), 3),
+        (dt.date(2024, 1, 6), 1),
+    ]
+    assert analytics.streaks(store, min_seconds=20 * 60) == [
+        (dt.date(2024, 1, 1), 2),
+        (dt.date(2024, 1, 6), 1),
+    ]
+    assert analytics.streaks(LapseStore()) == []
+
+
+def test_rolling_mean(backend):
+    assert analytics.rolling_mean([1, 2, 3, 4, 5], 2) == [1.5, 2.5, 3.5, 4.5]
+    assert analytics.rolling_mean([1, 2], 3) == []
+
+
+def test_averages_and_ratio(backend, store):
+    assert analytics.average_lapse_seconds(store) == 26 * 60
+    assert analytics.average_lapse_seconds(LapseStore()) == 0
+    assert analytics.focus_rest_ratio(store) == 13
+    assert analytics.focus_rest_ratio(LapseStore()) is None
@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+from sqlmodel import select
+
+import db
+from async_repositories import (
+    AsyncGoalsRepository,
+    AsyncSkillRepository,
+    AsyncStatsRepository,
+)
+from domain import Goal, Skill, Stat
+from focus import Focus
+from models import GoalModel
+from repositories import SkillUpdate, StatUpdate
+from writer import BackgroundWriter, SynchronousWriter
+
+
+def test_async_repositories_round_trip():
+    async def main():
+        stat = await AsyncStatsRepository().create_stat(Stat(name="test-strength"))
+        skill = await AsyncSkillRepository().create_skill(
+            Skill(name="test-skill", main_stat=stat)
+        )
+        await AsyncSkillRepository().update_skill(
+            update=SkillUpdate(id=skill.id, xp=10)
+        )
+        await AsyncStatsRepository().update_stat(update=StatUpdate(id=stat.id, value=3))
+
+        return (
+            await AsyncSkillRepository().get_skill_by_name("test-skill"),
+            await AsyncStatsRepository().get_all_stats(),
+        )
+
+    skill, stats = asyncio.run(main())
+
+    assert skill.xp == 10
+    assert skill.main_stat.value == 3
+    assert [stat.name for stat in stats] == ["test-strength"]
+
+
+def test_loop_runs_while_awaiting():
+    """Other tasks keep running while a repository call is in flight."""
+
+    async def main():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        task = asyncio.create_task(tick())
+        await AsyncGoalsRepository().create_goal(
+            Goal(
+                title="Test",
+                main_skill=Skill(name="test-skill", main_stat=Stat(name="test-stat")),
+            )
+        )
+        task.cancel()
+
+        return ticks
+
+    assert asyncio.run(main()) > 0
+
+
+@pytest.mark.parametrize(
+    "writer", [SynchronousWriter, lambda: BackgroundWriter(batch_delay=0)]
+)
+def test_complete_goal_async(writer):
+    """Goals are created and completed through the writer of the app."""
+    app = Focus(writer=writer())
+
+    async def main():
+        await app.add_goal_async(
+            Goal(
+                title="Test",
+                main_skill=Skill(name="test-skill", main_stat=Stat(name="test-stat")),
+            )
+        )
+        [goal_id] = app.goals
+
+        return (
+            await app.complete_goal_async(goal_id),
+            await app.complete_goal_async(goal_id),
+        )
+
+    assert asyncio.run(main()) == (True, False)
+    app.close()
+
+    with db.get_session() as session:
+        assert session.exec(select(GoalModel.completed)).one()
+
+
+def test_complete_goal_async_can_be_retried(mocker):
+    """A completion that couldn't be stored is undone, so it can be retried."""
+    app = Focus()
+
+    async def main():
+        await app.add_goal_async(
+            Goal(
+                title="Test",
+                main_skill=Skill(name="test-skill", main_stat=Stat(name="test-stat")),
+            )
+        )
+        [goal_id] = app.goals
+
+        mocker.patch(
+            "repositories.GoalsRepository.store_completion",
+            side_effect=OSError("disk full"),
+        )
+        with pytest.raises(OSError, match="disk full"):
+            await app.complete_goal_async(goal_id)
+        goal = app.goals[goal_id]
+        assert not goal.completed
+        assert goal.main_skill.xp == 0
+
+        mocker.stopall()
+        return await app.complete_goal_async(goal_id)
+
+    assert asyncio.run(main())
+
+    with db.get_session() as session:
+        assert session.exec(select(GoalModel.completed)).one()
@@ -0,0 +1,128 @@
+import datetime as dt
+import sqlite3
+
+import pytest
+from sqlalchemy import text
+
+import db
+from db import UnitOfWork, get_session, get_unit_of_work
+from domain import Stat
+from history import History
+from repositories import StatsRepository
+from timer import Lapse, LapseType
+
+
+def test_unit_of_work_commits_once(commits):
+    """Repositories join the unit of work and commit when it exits."""
+    with UnitOfWork() as unit_of_work:
+        repository = StatsRepository()
+        assert repository.session is unit_of_work.session
+
+        repository.create_stat(Stat(name="test-strength"))
+        repository.create_stat(Stat(name="test-int"))
+
+        with UnitOfWork() as inner:
+            assert inner.session is unit_of_work.session
+            StatsRepository().create_stat(Stat(name="test-dex"))
+
+        assert not commits
+
+    assert len(commits) == 1
+    assert get_unit_of_work() is None
+    assert len(list(StatsRepository().get_all_stats())) == 3
+
+
+def test_unit_of_work_rolls_back_on_error():
+    def create_and_fail():
+        with UnitOfWork():
+            StatsRepository().create_stat(Stat(name="test-strength"))
+            raise RuntimeError
+
+    with pytest.raises(RuntimeError):
+        create_and_fail()
+
+    assert StatsRepository().get_stat_by_name("test-strength") is None
+
+
+def test_unit_of_work_closes_its_session():
+    with UnitOfWork() as unit_of_work:
+        StatsRepository().create_stat(Stat(name="test-strength"))
+
+    assert not unit_of_work.session.identity_map
+
+
+def test_existing_databases_get_the_completed_index():
+    with db.get_engine().begin() as connection:
+        connection.execute(text("DROP INDEX ix_goalmodel_completed"))
+
+    db.create_db_and_tables()
+
+    with db.get_engine().connect() as connection:
+        assert connection.execute(
+            text(
+                "SELECT 1 FROM sqlite_master"
+                " WHERE type = 'index' AND name = 'ix_goalmodel_completed'"
+            )
+        ).one()
+
+
+def test_repository_closes_the_session_it_opened():
+    with StatsRepository() as repository:
+        list(repository.get_all_stats())
+        assert repository.session.in_transaction()
+
+    assert not repository.session.in_transaction()
+
+
+def test_repository_leaves_given_sessions_open():
+    with get_session() as session:
+        with StatsRepository(session) as repository:
+            list(repository.get_all_stats())
+
+        assert session.in_transaction()
+
+
+def test_history_shares_the_configured_database():
+    """`History` and the repositories use the same engine."""
+    assert db.get_engine() is db.get_engine()
+
+    history = History()
+    history.add_entries(
+        Lapse(
+            start=dt.datetime(2024, 1, 1, tzinfo=dt.UTC),
+            end=dt.datetime(2024, 1, 1, 0, 0, 10, tzinfo=dt.UTC),
+            type=LapseType.focus,
+        )
+    )
+
+    with get_session() as session:
+        count = session.exec(text("SELECT COUNT(*) FROM history")).one()
+
+    assert count == (1,)
+
+    with history.conn:
+        history.conn.execute("DROP TABLE history")
+    history.close()
+
+
+@pytest.mark.parametrize(("profile", "synchronous"), [("fast", 1), ("durable", 2)])
+def test_connection_profile(tmp_path, profile, synchronous):
+    """Every new connection gets the pragmas of the profile."""
+    connection = sqlite3.connect(tmp_path / "profile.db")
+    db.PROFILES[profile].apply(connection)
+
+    assert connection.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+    assert connection.execute("PRAGMA synchronous").fetchone() == (synchronous,)
+    assert connection.execute("PRAGMA busy_timeout").fetchone() == (5000,)
+    connection.close()
+
+
+def test_engine_connections_use_profile(tmp_path):
+    url = db.sqlite_url(str(tmp_path / "engine.db"))
+
+    connection = db.raw_connection(url)
+
+    assert connection.driver_connection.execute("PRAGMA journal_mode").fetchone() == (
+        "wal",
+    )
+    connection.close()
@@ -0,0 +1,81 @@
+import pytest
+
+from domain import Difficulty, Goal, Skill, Stat
+from events import EventBus
+from signals import skills_changed
+
+
+@pytest.fixture
+def deliveries():
+    received = []
+
+    def receive(sender, changes):
+        received.append([(c.skill.name, c.xp_earned, c.levels) for c in changes])
+
+    skills_changed.connect(receive)
+    yield received
+    skills_changed.disconnect(receive)
+
+
+def _skill(name: str) -> Skill:
+    return Skill(name=name, main_stat=Stat(name=f"{name}-stat"))
+
+
+def test_synchronous_delivery(deliveries):
+    """Without a schedule every event is delivered right away."""
+    bus = EventBus()
+    skill = _skill("test-skill")
+
+    skill.add_xp(xp_earned=10)
+    skill.add_xp(xp_earned=150)
+
+    assert deliveries == [
+        [("test-skill", 10, 0)],
+        [("test-skill", 150, 0)],
+        [("test-skill", 0, 1)],
+    ]
+    bus.close()
+
+
+def test_buffering_coalesces_per_skill(deliveries):
+    bus = EventBus()
+    goal = Goal(
+        title="Test",
+        difficulty=Difficulty.PROJECT,
+        main_skill=_skill("test-main"),
+        secondary_skill=_skill("test-secondary"),
+    )
+
+    with bus.buffering():
+        goal.complete()
+        goal.main_skill.add_xp(xp_earned=5)
+
+    assert deliveries == [[("test-main", 1005, 4), ("test-secondary", 500, 3)]]
+    bus.close()
+
+
+def test_scheduled_delivery(deliveries):
+    """With a schedule, a burst of events is flushed once, when it says."""
+    scheduled = []
+    bus = EventBus(schedule=scheduled.append)
+    skill = _skill("test-skill")
+
+    for _ in range(10):
+        skill.add_xp(xp_earned=50)
+
+    assert deliveries == []
+    assert scheduled == [bus.flush]
+
+    scheduled.pop()()
+
+    assert deliveries == [[("test-skill", 500, 3)]]
+    bus.close()
+
+
+def test_closed_bus_delivers_nothing(deliveries):
+    bus = EventBus()
+    bus.close()
+
+    _skill("test-skill").add_xp(xp_earned=10)
+
+    assert deliveries == []
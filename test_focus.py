@@ -1,5 +1,8 @@
-from domain import Goal, Skill, Stat
+import datetime as dt
+
+from domain import Difficulty, Goal, Skill, Stat
 from focus import Focus
+from history import History
 from repositories import (
     GoalsRepository,
     StatsRepository,
@@ -41,3 +44,82 @@ def test_load_goals_from_database():
     app = Focus()
 
     assert len(app.goals) == 2
+
+
+def test_snapshot(freezer):
+    """A snapshot reports clock, totals and break balance at one instant."""
+    app = Focus()
+
+    app.focus()
+    freezer.tick(delta=dt.timedelta(seconds=100))
+
+    snapshot = app.snapshot()
+
+    assert snapshot.focusing
+    assert not snapshot.resting
+    assert snapshot.clock == 100
+    assert snapshot.total_focused == 100
+    assert snapshot.earned_break_time == 100 // app.focus_break_ratio
+    assert not snapshot.break_exhausted
+
+    app.earned_break_time = 10
+    app.focused_timer.stop()
+    app.breaks_timer.start()
+    freezer.tick(delta=dt.timedelta(seconds=15))
+
+    snapshot = app.snapshot()
+
+    assert snapshot.resting
+    assert snapshot.clock == 15
+    assert snapshot.total_rested == 15
+    assert snapshot.earned_break_time == -5
+    assert snapshot.break_exhausted
+
+
+def test_complete_goal_commits_once(commits):
+    """Completing a goal stores goal, skills and stats in a single commit."""
+    goal = GoalsRepository().create_goal(
+        Goal(
+            title="Test",
+            difficulty=Difficulty.MEDIUM,
+            main_skill=Skill(
+                name="test-skill",
+                main_stat=Stat(name="main-stat"),
+                secondary_stat=Stat(name="secondary-stat"),
+            ),
+            secondary_skill=Skill(
+                name="test-skill-2", main_stat=Stat(name="main-stat-2")
+            ),
+        )
+    )
+    app = Focus()
+    commits.clear()
+
+    assert app.complete_goal(goal.id)
+
+    assert len(commits) == 1
+    assert GoalsRepository().get_goal_by_id(goal.id).main_skill.level == 2
+
+
+def test_pauses_are_recorded_apart(freezer):
+    """Time spent paused isn't counted as focus."""
+    history = History()
+    app = Focus(history=history)
+    start = dt.datetime.now(dt.UTC).date()
+
+    app.focus()
+    freezer.tick(delta=dt.timedelta(minutes=10))
+    app.pause()
+    freezer.tick(delta=dt.timedelta(minutes=50))
+    app.unpause()
+    freezer.tick(delta=dt.timedelta(minutes=1))
+    app.rest()
+
+    assert [(lapse.type, lapse.get_seconds()) for lapse in history.get_entries()] == [
+        ("focus", 600),
+        ("pause", 3000),
+        ("focus", 60),
+    ]
+    statistics = history.get_statistics(start)
+    assert statistics.total_focus_time == 660
+    assert statistics.total_pause_time == 3000
@@ -1,4 +1,10 @@
+import itertools
+
+import pytest
+
 from domain import Goal, Skill, Stat
+from focus import Focus, GoalsPager
+from repositories import GoalsRepository
 
 
 def test_goal_complete():
@@ -13,3 +19,74 @@ def test_goal_complete():
     assert goal.completed
     assert goal.main_skill.xp == 10
     assert goal.secondary_skill.xp == 5
+
+
+def _create_goals(count: int):
+    repository = GoalsRepository()
+    for i in range(count):
+        repository.create_goal(
+            Goal(
+                title=f"Test {i}",
+                main_skill=Skill(
+                    name=f"test-skill-{i}",
+                    main_stat=Stat(name=f"main-stat-{i}"),
+                    secondary_stat=Stat(name=f"secondary-stat-{i}"),
+                ),
+                secondary_skill=Skill(
+                    name=f"test-skill-2-{i}", main_stat=Stat(name=f"main-stat-2-{i}")
+                ),
+            )
+        )
+
+
+@pytest.mark.parametrize("count", [1, 10])
+def test_load_all_goals_constant_statements(statements, count):
+    """Loading goals with their skills and stats doesn't query per goal."""
+    _create_goals(count)
+    statements.clear()
+
+    goals = list(GoalsRepository().get_all_goals())
+
+    assert len(goals) == count
+    assert goals[0].main_skill.secondary_stat.name == "secondary-stat-0"
+    assert goals[0].secondary_skill.main_stat.name == "main-stat-2-0"
+    assert len(statements) == 1
+
+
+def test_goals_pages(mocker):
+    """Incomplete goals are paged by id. Completed ones are loaded apart."""
+    mocker.patch("conf.GOALS_PAGE_SIZE", 3)
+    _create_goals(7)
+    repository = GoalsRepository()
+    completed_ids = [goal.id for goal in repository.get_all_goals()][1:3]
+    for goal_id in completed_ids:
+        Focus().complete_goal(goal_id)
+
+    app = Focus()
+    pages = [[goal.id for goal in app.goals.values()]]
+    while not app.incomplete_goals.exhausted:
+        pages.append([goal.id for goal in app.incomplete_goals.next_page()])
+
+    assert [len(page) for page in pages] == [3, 2]
+    ids = list(itertools.chain.from_iterable(pages))
+    assert sorted(ids) == ids
+    assert not set(completed_ids) & set(ids)
+
+    completed = GoalsPager(app, completed=True)
+    assert [goal.id for goal in completed.next_page()] == completed_ids
+    assert completed.exhausted
+
+
+def test_goals_pager_loaded(mocker):
+    mocker.patch("conf.GOALS_PAGE_SIZE", 2)
+    _create_goals(5)
+    ids = [goal.id for goal in GoalsRepository().get_all_goals()]
+    pager = Focus().incomplete_goals
+
+    assert pager.loaded(ids[0])
+    assert pager.loaded(ids[1])
+    assert not pager.loaded(ids[2])
+
+    while not pager.exhausted:
+        pager.next_page()
+    assert pager.loaded(ids[-1] + 1)
@@ -1,10 +1,11 @@
 import datetime as dt
+import itertools
 import sqlite3
 
 import pytest
 
 from history import History
-from timer import Lapse, LapseType
+from timer import Lapse, LapseStore, LapseType
 
 
 @pytest.fixture
@@ -97,3 +98,209 @@ def test_calculate_statistics(db):
 
     assert stats.total_focus_time == 30
     assert stats.total_break_time == 50
+
+
+def test_add_entries_in_chunks(db):
+    """Entries can come from any iterable and are counted when skipped."""
+    with db:
+        db.execute("DROP TABLE IF EXISTS history;")
+
+    history = History(db_name="focus_test.db")
+
+    now = dt.datetime.now(dt.UTC)
+
+    def lapses():
+        for i in range(25):
+            start = now + dt.timedelta(seconds=10 * i)
+            yield Lapse(
+                start=start, end=start + dt.timedelta(seconds=5), type=LapseType.focus
+            )
+
+    result = history.add_entries(lapses(), chunk_size=10)
+
+    assert result.inserted == 25
+    assert result.skipped == 0
+
+    result = history.add_entries(itertools.chain(lapses(), [next(lapses())]))
+
+    assert result.inserted == 0
+    assert result.skipped == 26
+    assert len(history.get_entries()) == 25
+
+
+def test_statistics_day_boundaries(db):
+    """Lapses belong to the day they started on."""
+    with db:
+        db.execute("DROP TABLE IF EXISTS history;")
+
+    history = History(db_name="focus_test.db")
+    history.add_entries(
+        Lapse(
+            start=dt.datetime(2024, 1, 1, 23, 59, 50, tzinfo=dt.UTC),
+            end=dt.datetime(2024, 1, 2, 0, 0, 10, tzinfo=dt.UTC),
+            type=LapseType.pause,
+        )
+    )
+
+    stats = history.get_statistics(dt.date(2024, 1, 1))
+
+    assert stats.total_pause_time == 20
+    assert history.get_statistics(dt.date(2024, 1, 2)).total_pause_time == 0
+
+
+def test_statistics_range(db):
+    """Totals are grouped by day, week or month in one call."""
+    with db:
+        db.execute("DROP TABLE IF EXISTS history;")
+
+    history = History(db_name="focus_test.db")
+
+    def lapse(day: int, seconds: int, type: LapseType) -> Lapse:
+        start = dt.datetime(2024, 1, day, 12, tzinfo=dt.UTC)
+        return Lapse(start=start, end=start + dt.timedelta(seconds=seconds), type=type)
+
+    history.add_entries(
+        [
+            lapse(1, 10, LapseType.focus),
+            lapse(2, 20, LapseType.focus),
+            lapse(3, 5, LapseType.rest),
+            lapse(8, 40, LapseType.focus),
+            lapse(31, 7, LapseType.pause),
+        ]
+    )
+
+    daily = history.get_statistics_range(dt.date(2024, 1, 1), dt.date(2024, 1, 3))
+
+    assert daily.buckets == [dt.date(2024, 1, day) for day in (1, 2, 3)]
+    assert daily.total_focus_time == [10, 20, 0]
+    assert daily.total_break_time == [0, 0, 5]
+
+    weekly = history.get_statistics_range(
+        dt.date(2024, 1, 1), dt.date(2024, 1, 14), bucket="week"
+    )
+
+    assert weekly.buckets == [dt.date(2024, 1, 1), dt.date(2024, 1, 8)]
+    assert weekly.total_focus_time == [30, 40]
+
+    monthly = history.get_statistics_range(
+        dt.date(2024, 1, 1), dt.date(2024, 2, 29), bucket="month"
+    )
+
+    assert monthly.buckets == [dt.date(2024, 1, 1), dt.date(2024, 2, 1)]
+    assert monthly.total_focus_time == [70, 0]
+    assert monthly.total_pause_time == [7, 0]
+
+
+def test_migrate_text_history(db):
+    """A history with ISO string dates is migrated and gets its totals."""
+    with db:
+        db.execute("DROP TABLE IF EXISTS history;")
+        db.execute("DROP TABLE IF EXISTS daily_totals;")
+        db.execute("PRAGMA user_version = 0;")
+        db.execute(
+            """
+        CREATE TABLE history (
+        start DATETIME PRIMARY KEY,
+        end DATETIME NOT NULL,
+        type TEXT NOT NULL CHECK (type IN ('rest', 'focus', 'pause'))
+        );"""
+        )
+        db.execute(
+            "INSERT INTO history VALUES (?, ?, ?)",
+            ("2024-01-01 10:00:00+00:00", "2024-01-01 10:00:30+00:00", "focus"),
+        )
+
+    history = History(db_name="focus_test.db")
+
+    assert history.get_entries() == [
+        Lapse(
+            start=dt.datetime(2024, 1, 1, 10, tzinfo=dt.UTC),
+            end=dt.datetime(2024, 1, 1, 10, 0, 30, tzinfo=dt.UTC),
+            type=LapseType.focus,
+        )
+    ]
+    assert history.get_statistics(dt.date(2024, 1, 1)).total_focus_time == 30
+    assert history.check_daily_totals() == []
+
+    with db:
+        db.execute("UPDATE daily_totals SET total_seconds = 1")
+
+    assert history.check_daily_totals() == [("2024-01-01", "focus")]
+
+    history.rebuild_daily_totals()
+
+    assert history.check_daily_totals() == []
+
+
+def test_iter_entries(db):
+    """Entries are walked lazily, in pages, with optional filters."""
+    with db:
+        db.execute("DROP TABLE IF EXISTS history;")
+
+    history = History(db_name="focus_test.db")
+
+    start = dt.datetime(2024, 1, 1, tzinfo=dt.UTC)
+    lapses = [
+        Lapse(
+            start=start + dt.timedelta(minutes=i),
+            end=start + dt.timedelta(minutes=i, seconds=30),
+            type=LapseType.focus if i % 2 else LapseType.rest,
+        )
+        for i in range(10)
+    ]
+    history.add_entries(reversed(lapses))
+
+    assert list(history.iter_entries(page_size=3)) == lapses
+    assert list(history.iter_entries(limit=4, page_size=3)) == lapses[:4]
+    assert list(
+        history.iter_entries(
+            since=lapses[2].start, until=lapses[8].start, type=LapseType.focus
+        )
+    ) == [lapses[3], lapses[5], lapses[7]]
+
+
+def test_lapse_store(db):
+    """A `LapseStore` can be added to and loaded from the history."""
+    with db:
+        db.execute("DROP TABLE IF EXISTS history;")
+
+    history = History(db_name="focus_test.db")
+
+    start = dt.datetime(2024, 1, 1, tzinfo=dt.UTC)
+    store = LapseStore(
+        Lapse(
+            start=start + dt.timedelta(minutes=i),
+            end=start + dt.timedelta(minutes=i, seconds=20),
+            type=LapseType.rest,
+        )
+        for i in range(5)
+    )
+
+    assert history.add_entries(store).inserted == 5
+
+    loaded = history.get_store(since=start + dt.timedelta(minutes=1), limit=3)
+
+    assert loaded.to_lapses() == store.to_lapses()[1:4]
+    assert history.get_statistics(start).total_break_time == 100
+
+
+def test_daily_totals_follow_updates(db):
+    """Updating a lapse moves its seconds to its new day and type."""
+    with db:
+        db.execute("DROP TABLE IF EXISTS history;")
+
+    history = History(db_name="focus_test.db")
+    start = dt.datetime(2024, 1, 1, 10, tzinfo=dt.UTC)
+    history.add_entries(
+        Lapse(start=start, end=start + dt.timedelta(minutes=10), type=LapseType.focus)
+    )
+
+    with history.conn:
+        history.conn.execute(
+            "UPDATE history SET start = start + ?, end = end + ?, type = 'rest'",
+            (86_400_000_000, 86_400_000_000 + 300_000_000),
+        )
+
+    assert history.get_statistics(dt.date(2024, 1, 1)).total_focus_time == 0
+    assert history.get_statistics(dt.date(2024, 1, 2)).total_break_time == 900
+    assert history.check_daily_totals() == []
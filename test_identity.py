@@ -0,0 +1,74 @@
+import pytest
+
+from db import UnitOfWork
+from domain import Skill, Stat
+from focus import Focus
+from identity import identity_map
+from repositories import SkillRepository, SkillUpdate, StatsRepository
+from services import SkillsService
+
+
+def _create_skill() -> Skill:
+    return SkillRepository().create_skill(
+        Skill(
+            name="test-programming",
+            main_stat=Stat(name="test-int"),
+            secondary_stat=Stat(name="test-wis"),
+        )
+    )
+
+
+def test_one_object_per_row():
+    """Services update the same skill instance the app holds."""
+    skill = _create_skill()
+    identity_map.clear()
+
+    app = Focus()
+    app_skill = app.new_skills["test-programming"]
+
+    SkillsService().grant_xp(150, skill_id=skill.id)
+
+    assert app_skill.level == 2
+    assert app_skill.main_stat is app.stats["test-int"]
+    assert app.stats["test-int"].value == 3
+    assert SkillRepository().get_skill_by_id(skill.id) is app_skill
+
+
+def test_hot_reads_skip_the_database(statements):
+    skill = _create_skill()
+    statements.clear()
+
+    assert SkillRepository().get_skill_by_id(skill.id) is skill
+    assert SkillRepository().get_skill_by_name("Test-Programming") is skill
+    assert StatsRepository().get_stat_by_name("test-int") is skill.main_stat
+    assert not statements
+
+
+def test_invalidate():
+    """An invalidated row is loaded again, into a new object."""
+    skill = _create_skill()
+
+    identity_map.invalidate(Skill, skill.id)
+    loaded = SkillRepository().get_skill_by_id(skill.id)
+
+    assert loaded is not skill
+    assert loaded == skill
+    assert SkillRepository().get_skill_by_name("test-programming") is loaded
+
+
+def test_rollback_invalidates_only_touched_rows():
+    skill = _create_skill()
+    stat = StatsRepository().create_stat(Stat(name="test-dex"))
+
+    with pytest.raises(RuntimeError):
+        _fail_to_update(skill)
+
+    assert SkillRepository().get_skill_by_id(skill.id) is not skill
+    assert SkillRepository().get_skill_by_id(skill.id).level == 1
+    assert StatsRepository().get_stat_by_name("test-dex") is stat
+
+
+def _fail_to_update(skill: Skill):
+    with UnitOfWork():
+        SkillRepository().update_skill(update=SkillUpdate(id=skill.id, level=5))
+        raise RuntimeError
@@ -0,0 +1,33 @@
+import pytest
+
+from levels import NEXT_LEVEL_REQUIRED_XP_FACTOR, LevelCurve, level_curve
+
+
+def _step_by_step(xp: int, xp_to_next_level: int) -> tuple[int, int, int]:
+    levels = 0
+    while xp >= xp_to_next_level:
+        levels += 1
+        xp -= xp_to_next_level
+        xp_to_next_level = int(xp_to_next_level * NEXT_LEVEL_REQUIRED_XP_FACTOR)
+    return levels, xp, xp_to_next_level
+
+
+@pytest.mark.parametrize("first_requirement", [2, 100, 101, 337])
+def test_gain_matches_step_by_step(first_requirement):
+    curve = LevelCurve(first_requirement)
+
+    for xp in [*range(2000), 10**6, 10**12, 10**30]:
+        gain = curve.gain(xp)
+        assert (gain.levels, gain.xp, gain.xp_to_next_level) == _step_by_step(
+            xp, first_requirement
+        )
+
+
+def test_curves_are_shared():
+    assert level_curve(100) is level_curve(100)
+
+
+def test_requirement_must_grow():
+    """With 1 xp, rounding down keeps every level at 1 xp."""
+    with pytest.raises(ValueError, match="2 xp or more"):
+        LevelCurve(1)
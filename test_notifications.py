@@ -0,0 +1,119 @@
+import asyncio
+import math
+from collections.abc import Callable
+from dataclasses import replace
+
+import pytest
+
+from focus import TickSnapshot
+from notifications import BREAK_EXHAUSTED_MESSAGE, BreakNotifier, RecordingBackend
+
+_RESTING = TickSnapshot(
+    clock=0,
+    total_focused=0,
+    total_rested=0,
+    earned_break_time=0,
+    break_exhausted=False,
+    focusing=False,
+    resting=True,
+    paused=False,
+    until_next_second=0.05,
+)
+
+
+class FakeClock:
+    """I run the callbacks scheduled with `call_later` once `advance`d past
+    their time, instead of waiting for it."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self._scheduled: list[tuple[float, asyncio.Handle, Callable[[], None]]] = []
+
+    def call_later(self, delay: float, callback: Callable[[], None]) -> asyncio.Handle:
+        handle = asyncio.Handle(callback, (), asyncio.get_running_loop())
+        self._scheduled.append((self.now + delay, handle, callback))
+        return handle
+
+    def advance(self, seconds: float):
+        self.now += seconds
+        due = [item for item in self._scheduled if item[0] <= self.now]
+        self._scheduled = [item for item in self._scheduled if item[0] > self.now]
+        for _, handle, callback in due:
+            if not handle.cancelled():
+                callback()
+
+
+def _run(*snapshots: TickSnapshot, advance: float = 1) -> list[str]:
+    """Reschedule with each snapshot, and collect what's sent once the clock
+    moves `advance` seconds."""
+    backend = RecordingBackend()
+
+    async def main():
+        clock = FakeClock()
+        notifier = BreakNotifier(backend, call_later=clock.call_later)
+        for snapshot in snapshots:
+            notifier.reschedule(snapshot)
+        clock.advance(advance)
+        await notifier.drain()
+
+    asyncio.run(main())
+    return backend.messages
+
+
+def test_notifies_when_break_runs_out():
+    assert _run(_RESTING, advance=0.04) == []
+    assert _run(_RESTING, advance=0.05) == [BREAK_EXHAUSTED_MESSAGE]
+
+
+def test_notifies_once_per_break():
+    """Until focusing again, rescheduling doesn't notify again."""
+    exhausted = replace(_RESTING, earned_break_time=-1, break_exhausted=True)
+    focusing = replace(_RESTING, focusing=True, resting=False)
+    backend = RecordingBackend()
+
+    async def main():
+        clock = FakeClock()
+        notifier = BreakNotifier(backend, call_later=clock.call_later)
+        notifier.reschedule(exhausted)
+        clock.advance(0)
+        notifier.reschedule(exhausted)
+        clock.advance(0)
+        await notifier.drain()
+        assert len(backend.messages) == 1
+
+        notifier.reschedule(focusing)
+        notifier.reschedule(exhausted)
+        clock.advance(0)
+        await notifier.drain()
+
+    asyncio.run(main())
+
+    assert backend.messages == [BREAK_EXHAUSTED_MESSAGE] * 2
+
+
+@pytest.mark.parametrize(
+    "snapshot",
+    [
+        replace(_RESTING, paused=True, resting=False, until_next_second=math.inf),
+        replace(_RESTING, focusing=True, resting=False),
+    ],
+)
+def test_nothing_scheduled_unless_resting(snapshot):
+    assert _run(_RESTING, snapshot) == []
+
+
+def test_failing_backend_is_logged(caplog):
+    class FailingBackend:
+        async def notify(self, message):
+            raise ConnectionRefusedError
+
+    async def main():
+        clock = FakeClock()
+        notifier = BreakNotifier(FailingBackend(), call_later=clock.call_later)
+        notifier.reschedule(replace(_RESTING, until_next_second=0))
+        clock.advance(0)
+        await notifier.drain()
+
+    asyncio.run(main())
+
+    assert "Could not notify" in caplog.text
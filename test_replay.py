@@ -0,0 +1,88 @@
+from sqlalchemy import update
+from sqlmodel import select
+
+import db
+from domain import Difficulty, Goal, Skill, Stat
+from focus import Focus
+from identity import identity_map
+from models import SkillModel, StatModel
+from replay import replay, seed
+from repositories import SkillRepository
+from services import SkillsService
+
+
+def _stored_state():
+    with db.get_session() as session:
+        return (
+            session.exec(
+                select(
+                    SkillModel.name,
+                    SkillModel.level,
+                    SkillModel.xp,
+                    SkillModel.xp_to_next_level,
+                ).order_by(SkillModel.name)
+            ).all(),
+            session.exec(
+                select(StatModel.name, StatModel.value).order_by(StatModel.name)
+            ).all(),
+        )
+
+
+def _scramble():
+    with db.get_session() as session:
+        session.exec(update(SkillModel).values(level=99, xp=0, xp_to_next_level=1))
+        session.exec(update(StatModel).values(value=0))
+        session.commit()
+    identity_map.clear()
+
+
+def test_replay_rebuilds_skills_and_stats(commits):
+    skill = SkillRepository().create_skill(
+        Skill(
+            name="test-skill",
+            main_stat=Stat(name="test-strength"),
+            secondary_stat=Stat(name="test-int"),
+        )
+    )
+    for xp in (30, 150, 1000, 5):
+        SkillsService().grant_xp(xp, skill_id=skill.id)
+
+    app = Focus()
+    app.add_goal(
+        Goal(
+            title="Test",
+            difficulty=Difficulty.HARD,
+            main_skill=Skill(name="test-skill-2", main_stat=Stat(name="test-dex")),
+            secondary_skill=skill,
+        )
+    )
+    app.complete_goal(next(iter(app.goals)))
+
+    expected = _stored_state()
+    _scramble()
+    commits.clear()
+
+    assert replay(batch_size=1) == 6
+    assert _stored_state() == expected
+    assert len(commits) == 1
+
+
+def test_seed_keeps_xp_earned_before_the_log():
+    skill = SkillRepository().create_skill(
+        Skill(name="test-skill", main_stat=Stat(name="test-strength"))
+    )
+    with db.get_session() as session:
+        session.exec(update(SkillModel).values(level=3, xp=20, xp_to_next_level=225))
+        session.exec(update(StatModel).values(value=5))
+        session.commit()
+    identity_map.clear()
+    expected = _stored_state()
+
+    assert seed() == 1
+    assert seed() == 0
+
+    _scramble()
+    replay()
+
+    assert _stored_state() == expected
+    assert SkillRepository().get_skill_by_id(skill.id).level == 3
@@ -0,0 +1,74 @@
+import asyncio
+import datetime as dt
+
+import pytest
+
+import conf
+from focus import Focus
+from scheduling import Wakeup, next_wakeup, seconds_until_break_exhausted
+
+
+def test_idle_while_stopped_or_paused(freezer):
+    app = Focus()
+    assert next_wakeup(app.snapshot()) is None
+
+    app.focus()
+    app.pause()
+    assert next_wakeup(app.snapshot()) is None
+
+
+def test_wakes_on_the_timer_second_boundaries(freezer):
+    app = Focus()
+    app.focus()
+
+    freezer.tick(delta=dt.timedelta(seconds=10.25))
+
+    assert next_wakeup(app.snapshot()) == pytest.approx(0.75)
+
+
+def test_hidden_sleeps_while_focusing(freezer):
+    """Nothing is shown, so the loop waits for the window to show."""
+    app = Focus()
+    app.focus()
+    freezer.tick(delta=dt.timedelta(seconds=60.25))
+
+    assert next_wakeup(app.snapshot(), visible=False) is None
+
+
+def test_hidden_sleeps_while_resting(freezer):
+    """The notifier, not the timer loop, tells when the break runs out."""
+    app = Focus()
+    app.focus()
+    freezer.tick(delta=dt.timedelta(seconds=conf.BREAK_RATIO * 100))
+    app.rest()
+
+    assert next_wakeup(app.snapshot(), visible=False) is None
+
+
+def test_seconds_until_break_exhausted(freezer):
+    app = Focus()
+    app.focus()
+    freezer.tick(delta=dt.timedelta(seconds=conf.BREAK_RATIO * 100))
+    app.rest()
+    freezer.tick(delta=dt.timedelta(seconds=30.5))
+
+    delay = seconds_until_break_exhausted(app.snapshot())
+    assert delay == pytest.approx(100 - 30.5 + 1)
+
+    freezer.tick(delta=dt.timedelta(seconds=delay - 0.01))
+    assert not app.snapshot().break_exhausted
+    freezer.tick(delta=dt.timedelta(seconds=0.02))
+    assert app.snapshot().break_exhausted
+
+
+def test_wakeup():
+    async def main():
+        wakeup = Wakeup()
+        timed_out = await wakeup.sleep(0.01)
+
+        asyncio.get_running_loop().call_soon(wakeup.wake)
+        woken = await wakeup.sleep(None)
+
+        return timed_out, woken
+
+    assert asyncio.run(main()) == (False, True)
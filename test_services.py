@@ -1,6 +1,10 @@
-from services import SkillsService, GoalsService
-from repositories import SkillRepository, GoalsRepository
-from domain import Stat, Skill, Goal, Difficulty
+from sqlmodel import select
+
+from db import get_session
+from domain import Difficulty, Goal, Skill, Stat
+from models import XpEventModel
+from repositories import GoalsRepository, SkillRepository
+from services import GoalsService, SkillsService
 
 
 def test_increase_level():
@@ -56,3 +60,18 @@ def test_complete_goal():
     assert updated_goal.main_skill.xp_to_next_level == 150
     assert updated_goal.main_skill.main_stat.value == 3
     assert updated_goal.main_skill.secondary_stat.value == 2
+
+
+def test_complete_goal_logs_the_rewards():
+    skill = SkillRepository().create_skill(
+        Skill(name="test-programming", main_stat=Stat(name="test-strength"))
+    )
+    goal = GoalsRepository().create_goal(
+        Goal(title="Pass this test", main_skill=skill, difficulty=Difficulty.MEDIUM)
+    )
+
+    GoalsService().complete_goal(goal.id)
+
+    with get_session() as session:
+        events = session.exec(select(XpEventModel.skill_id, XpEventModel.xp)).all()
+    assert events == [(skill.id, 100)]
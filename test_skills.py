@@ -97,5 +97,26 @@ def test_level_earned(mocker):
             level=2,
             main_stat=main_stat,
             xp_to_next_level=150,
-        )
+        ),
+        levels=1,
     )
+
+
+def test_levels_gained_at_once(mocker):
+    """A large grant sends a single signal with all the levels gained."""
+    callback = mocker.MagicMock()
+    level_gained.connect(callback)
+
+    main_stat = Stat(name="test-strength")
+    secondary_stat = Stat(name="test-int")
+    skill = Skill(
+        name="Test-strength", main_stat=main_stat, secondary_stat=secondary_stat
+    )
+
+    # 100 + 150 + 225 to reach level 4, and 10 towards level 5.
+    skill.add_xp(xp_earned=485)
+
+    assert (skill.level, skill.xp, skill.xp_to_next_level) == (4, 10, 337)
+    assert main_stat.value == 7
+    assert secondary_stat.value == 4
+    callback.assert_called_once_with(skill, levels=3)
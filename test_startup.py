@@ -0,0 +1,51 @@
+import subprocess
+import sys
+
+from bench import _STARTUP_MODULES
+
+
+def test_startup_does_not_import_the_database():
+    """The window shows before SQLAlchemy, SQLModel and pydantic load."""
+    code = (
+        f"import sys, {', '.join(_STARTUP_MODULES)}\n"
+        "focus.Focus(hydrate=False)\n"
+        "print(*sorted({m.partition('.')[0] for m in sys.modules}))"
+    )
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+
+    loaded = set(result.stdout.split())
+    assert not loaded & {"sqlalchemy", "sqlmodel", "pydantic", "db", "repositories"}
+
+
+def test_hydrate(freezer):
+    """Lapses recorded, and xp earned, before hydrating are written after."""
+    import datetime as dt
+
+    import conf
+    from domain import Skill, Stat
+    from focus import Focus
+    from identity import identity_map
+    from repositories import SkillRepository
+
+    SkillRepository().create_skill(
+        Skill(name="test-skill", main_stat=Stat(name="test-stat"))
+    )
+
+    app = Focus(hydrate=False)
+    assert not app.hydrated
+    assert app.current_skill is None
+
+    app.focus()
+    freezer.tick(delta=dt.timedelta(minutes=25))
+    app.rest()
+    app.hydrate()
+
+    assert app.hydrated
+    assert app.current_skill.name == "test-skill"
+    assert app.current_skill.xp == conf.BASE_XP
+    identity_map.clear()
+    assert SkillRepository().get_skill_by_name("test-skill").xp == conf.BASE_XP
+    assert list(app.stats) == ["test-stat"]
+    assert app.history.get_entries()[-1].get_seconds() == 25 * 60
@@ -1,6 +1,6 @@
 import datetime as dt
 
-from timer import Timer
+from timer import Lapse, LapseStore, LapseType, Timer
 
 
 def test_pause(freezer):
@@ -93,3 +93,77 @@ def test_pause_elapsed_time(freezer):
 
     freezer.tick(delta=dt.timedelta(seconds=3))
     assert t.get_current_elapsed_time() == 8
+
+
+def test_running_totals_match_lapses(freezer):
+    """The running totals must match summing the stored lapses."""
+    t = Timer()
+
+    operations = [t.start, t.pause, t.start, t.stop, t.start, t.pause, t.stop]
+    for step, operation in enumerate(operations * 20, start=1):
+        freezer.tick(delta=dt.timedelta(seconds=step % 7 + 1))
+        operation()
+
+        running_seconds = sum(lapse.get_seconds() for lapse in t._running_lapses)
+        paused_seconds = sum(lapse.get_seconds() for lapse in t._paused_lapses)
+        paused_since_start = sum(
+            lapse.get_seconds()
+            for lapse in t._paused_lapses
+            if t._start_time and lapse.start > t._start_time
+        )
+
+        assert t.get_total_elapsed_time() == (
+            t.get_current_elapsed_time() + running_seconds
+        )
+        assert t.get_total_paused_time() == (
+            t.get_current_paused_time() + paused_seconds
+        )
+        assert t.get_elapsed_seconds() == running_seconds - paused_seconds
+        assert t._paused_seconds_since_start == paused_since_start
+
+
+def test_lapse_store_round_trip():
+    """Lapses go in and come out of a store unchanged."""
+    start = dt.datetime(2024, 1, 1, 10, 0, 0, 123456, tzinfo=dt.UTC)
+    lapses = [
+        Lapse(
+            start=start,
+            end=start + dt.timedelta(seconds=90.5),
+            type=LapseType.focus,
+        ),
+        Lapse(
+            start=start + dt.timedelta(minutes=2),
+            end=start + dt.timedelta(minutes=3),
+            type=LapseType.pause,
+        ),
+    ]
+
+    store = LapseStore(lapses)
+
+    assert len(store) == 2
+    assert store.to_lapses() == lapses
+    assert store[1] == lapses[1]
+    assert store.get_seconds() == sum(lapse.get_seconds() for lapse in lapses)
+    assert store.get_seconds(LapseType.pause) == 60
+
+
+def test_timer_lapses(freezer):
+    """A timer hands out its lapses ordered by start."""
+    t = Timer()
+
+    t.start()
+    freezer.tick(delta=dt.timedelta(seconds=5))
+    t.pause()
+    freezer.tick(delta=dt.timedelta(seconds=2))
+    t.start()
+    freezer.tick(delta=dt.timedelta(seconds=3))
+    t.stop()
+
+    lapses = t.get_lapses().to_lapses()
+
+    assert [lapse.type for lapse in lapses] == [
+        LapseType.pause,
+        LapseType.focus,
+        LapseType.rest,
+    ]
+    assert [lapse.get_seconds() for lapse in lapses] == [5, 10, 2]
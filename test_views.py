@@ -0,0 +1,61 @@
+import datetime as dt
+from types import SimpleNamespace
+
+from focus import Focus
+from views import LabelView, TimerView, UpdateCounter
+
+
+def _label(text: str = ""):
+    return SimpleNamespace(text=text, style=SimpleNamespace(color=None))
+
+
+def test_label_view_skips_unchanged_values():
+    label = _label("00:00")
+    updates = UpdateCounter()
+    view = LabelView(label, updates)
+
+    view.render("00:00", color="black")
+    view.render("00:00", color="black")
+    view.render("00:01", color="black")
+
+    assert (label.text, label.style.color) == ("00:01", "black")
+    assert updates.total == 2
+
+
+def test_updates_per_minute():
+    now = 0.0
+    updates = UpdateCounter(clock=lambda: now)
+
+    updates.count()
+    now = 30
+    updates.count()
+    assert updates.per_minute() == 2
+
+    now = 61
+    assert updates.per_minute() == 1
+    assert updates.total == 2
+
+
+def test_timer_view_pushes_only_changes(freezer):
+    app = Focus()
+    labels = [_label() for _ in range(4)]
+    view = TimerView(
+        timer_label=labels[0],
+        total_focused_label=labels[1],
+        total_rested_label=labels[2],
+        earned_break_label=labels[3],
+    )
+
+    app.focus()
+    view.render(app.snapshot())
+    first_render = view.updates.total
+
+    view.render(app.snapshot())
+    assert view.updates.total == first_render
+
+    freezer.tick(delta=dt.timedelta(seconds=1))
+    view.render(app.snapshot())
+
+    # The clock and the total focused time.
+    assert view.updates.total == first_render + 2
+    assert labels[0].text == "00:01"
@@ -0,0 +1,176 @@
+import datetime as dt
+import threading
+
+import pytest
+from sqlmodel import select
+
+import db
+from domain import Skill, Stat
+from focus import Focus
+from history import History
+from models import SkillModel
+from repositories import SkillRepository
+from signals import write_failed
+from writer import BackgroundWriter, SynchronousWriter
+
+
+def test_commands_with_the_same_key_are_coalesced():
+    """Only the latest command for a key runs if earlier ones still wait."""
+    writer = BackgroundWriter(batch_delay=0)
+    release = threading.Event()
+    ran = []
+
+    writer.submit(release.wait)
+    for value in range(5):
+        writer.submit(lambda value=value: ran.append(("skill", value)), key="skill")
+    writer.submit(lambda: ran.append("other"))
+    release.set()
+
+    assert writer.flush(timeout=5)
+    assert ran == [("skill", 4), "other"]
+
+    writer.close()
+
+
+def test_close_writes_pending_commands():
+    writer = BackgroundWriter(batch_delay=60)
+    ran = []
+
+    writer.submit(lambda: ran.append(1))
+    writer.close(timeout=5)
+
+    assert ran == [1]
+
+
+def test_failing_batch_does_not_stop_the_writer(caplog):
+    writer = BackgroundWriter(batch_delay=0)
+    ran = []
+
+    writer.submit(lambda: 1 / 0)
+    writer.flush(timeout=5)
+    writer.submit(lambda: ran.append(1))
+    writer.close(timeout=5)
+
+    assert ran == [1]
+    assert "Could not write" in caplog.text
+
+
+def test_failed_commands_are_held_until_the_next_flush():
+    writer = BackgroundWriter(batch_delay=0)
+    failures = []
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError
+
+    def failed(sender, count):
+        failures.append(count)
+
+    with write_failed.connected_to(failed):
+        writer.submit(flaky)
+
+        assert not writer.flush(timeout=5)
+        assert writer.flush(timeout=5)
+
+    assert len(attempts) == 2
+    assert failures == [1]
+
+    writer.close()
+
+
+def test_held_command_is_replaced_by_a_later_one():
+    writer = SynchronousWriter()
+    ran = []
+
+    writer.submit(lambda: 1 / 0, key="skill")
+    writer.submit(lambda: ran.append(1), key="skill")
+
+    assert writer.flush()
+    assert ran == [1]
+
+
+def test_call_returns_the_result_or_the_error():
+    writer = BackgroundWriter(batch_delay=0)
+
+    result = writer.call(lambda: 42)
+    error = writer.call(lambda: 1 / 0)
+
+    assert result.result(timeout=5) == 42
+    with pytest.raises(ZeroDivisionError):
+        error.result(timeout=5)
+    assert writer.flush(timeout=5)
+
+    writer.close()
+
+
+def test_focus_persists_in_the_background(freezer):
+    """Resting grants xp at once, and is stored when the writer runs."""
+    SkillRepository().create_skill(
+        Skill(name="test-skill", main_stat=Stat(name="test-stat"))
+    )
+    history = History()
+    app = Focus(writer=BackgroundWriter(batch_delay=0), history=history)
+
+    app.focus()
+    freezer.tick(delta=dt.timedelta(minutes=25))
+    app.rest()
+
+    assert app.current_skill.xp > 0
+
+    app.flush()
+    with db.get_session() as session:
+        stored = session.exec(
+            select(SkillModel).where(SkillModel.name == "test-skill")
+        ).one()
+    assert stored.xp == app.current_skill.xp
+
+    lapse = history.get_entries()[-1]
+    assert lapse.type == "focus"
+    assert lapse.get_seconds() == 25 * 60
+
+    app.close()
+
+
+def test_skill_is_stored_as_it_was_when_submitted(freezer):
+    """Later changes to the skill aren't written by an earlier command."""
+    skill = SkillRepository().create_skill(
+        Skill(name="test-skill", main_stat=Stat(name="test-stat"))
+    )
+    writer = BackgroundWriter(batch_delay=60)
+    app = Focus(writer=writer, history=History())
+
+    app._store_skill(skill, 10)
+    stored_xp = skill.xp
+    skill.xp += 5
+    app.close()
+
+    with db.get_session() as session:
+        stored = session.get(SkillModel, skill.id)
+    assert stored.xp == stored_xp
+
+
+def test_lapses_survive_a_failed_write(freezer, mocker):
+    history = History()
+    add_entries = history.add_entries
+    attempts = []
+
+    def flaky(lapses):
+        attempts.append(lapses)
+        if len(attempts) == 1:
+            raise OSError
+        return add_entries(lapses)
+
+    mocker.patch.object(history, "add_entries", side_effect=flaky)
+    app = Focus(writer=BackgroundWriter(batch_delay=0), history=history)
+
+    app.focus()
+    freezer.tick(delta=dt.timedelta(minutes=25))
+    app.rest()
+
+    assert not app.flush()
+    assert app.flush()
+    assert history.get_entries()[-1].get_seconds() == 25 * 60
+
+    app.close()
@@ -1,4 +1,8 @@
 import datetime as dt
+import itertools
+import math
+from array import array
+from collections.abc import Iterable, Iterator
 from dataclasses import astuple, dataclass
 from enum import StrEnum, auto
 
@@ -26,7 +30,7 @@ def duration_from_seconds(seconds) -> Duration:
     return Duration(minutes=seconds // 60, seconds=seconds % 60)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Lapse:
     start: dt.datetime
     end: dt.datetime
@@ -38,6 +42,94 @@ class Lapse:
         return int((self.end - self.start).total_seconds())
 
 
+_EPOCH = dt.datetime(1970, 1, 1, tzinfo=dt.UTC)
+_MICROSECOND = dt.timedelta(microseconds=1)
+
+
+def to_epoch_us(date: dt.datetime) -> int:
+    """Microseconds since the epoch. Naive datetimes are taken as UTC."""
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=dt.UTC)
+    return (date - _EPOCH) // _MICROSECOND
+
+
+def from_epoch_us(epoch_us: int) -> dt.datetime:
+    """The UTC datetime `epoch_us` microseconds after the epoch."""
+    return _EPOCH + dt.timedelta(microseconds=epoch_us)
+
+
+_LAPSE_TYPES = list(LapseType)
+_LAPSE_TYPE_CODES = {lapse_type: code for code, lapse_type in enumerate(_LAPSE_TYPES)}
+
+
+class LapseStore:
+    """I store lapses column by column: starts and ends as epoch
+    microseconds, and types as one byte each.
+
+    Iterating me yields `Lapse` objects. Use `rows` to skip building them.
+
+    """
+
+    def __init__(self, lapses: Iterable[Lapse] = ()) -> None:
+        self.starts = array("q")
+        self.ends = array("q")
+        self.types = array("B")
+
+        self.extend(lapses)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, index: int) -> Lapse:
+        return Lapse(
+            start=from_epoch_us(self.starts[index]),
+            end=from_epoch_us(self.ends[index]),
+            type=_LAPSE_TYPES[self.types[index]],
+        )
+
+    def __iter__(self) -> Iterator[Lapse]:
+        for start, end, type in self.rows():
+            yield Lapse(start=from_epoch_us(start), end=from_epoch_us(end), type=type)
+
+    @staticmethod
+    def type_code(type: LapseType) -> int:
+        """The byte used for `type` in the `types` column."""
+        return _LAPSE_TYPE_CODES[type]
+
+    def append(self, lapse: Lapse):
+        self.append_row(to_epoch_us(lapse.start), to_epoch_us(lapse.end), lapse.type)
+
+    def append_row(self, start: int, end: int, type: LapseType):
+        """Append a lapse given as epoch microseconds."""
+        self.starts.append(start)
+        self.ends.append(end)
+        self.types.append(_LAPSE_TYPE_CODES[type])
+
+    def extend(self, lapses: Iterable[Lapse]):
+        for lapse in lapses:
+            self.append(lapse)
+
+    def rows(self) -> Iterator[tuple[int, int, LapseType]]:
+        """Yield `(start, end, type)` tuples, dates as epoch microseconds."""
+        for start, end, code in zip(self.starts, self.ends, self.types, strict=True):
+            yield start, end, _LAPSE_TYPES[code]
+
+    def to_lapses(self) -> list[Lapse]:
+        return list(self)
+
+    def get_seconds(self, type: LapseType | None = None) -> int:
+        """Total seconds of the lapses, of `type` only if given. Each lapse
+        counts as `Lapse.get_seconds` would."""
+        code = _LAPSE_TYPE_CODES[type] if type is not None else None
+        return sum(
+            (end - start) // 1_000_000
+            for start, end, lapse_code in zip(
+                self.starts, self.ends, self.types, strict=True
+            )
+            if code is None or lapse_code == code
+        )
+
+
 def _now() -> dt.datetime:
     return dt.datetime.now(dt.UTC)
 
@@ -50,8 +142,14 @@ class Timer:
         self._pause_time: dt.datetime | None = None
         self.total_elapsed_time: int = 0
 
-        self._running_lapses: list[Lapse] = []
-        self._paused_lapses: list[Lapse] = []
+        self._running_lapses = LapseStore()
+        self._paused_lapses = LapseStore()
+
+        # Running aggregates of the lapses above, so getters don't need to
+        # walk the whole history on every call.
+        self._running_seconds: int = 0
+        self._paused_seconds: int = 0
+        self._paused_seconds_since_start: int = 0
 
     @property
     def running(self) -> bool:
@@ -70,14 +168,34 @@ class Timer:
     def stopped(self) -> bool:
         return self._start_time is None
 
-    def get_current_elapsed_time(self) -> int:
-        """Seconds elapsed since current start time - paused_time."""
-        now = _now()
-        paused_time = sum(
-            lapse.get_seconds()
-            for lapse in self._paused_lapses
-            if self._start_time and lapse.start > self._start_time
-        )
+    def _add_running_lapse(self, lapse: Lapse):
+        self._running_lapses.append(lapse)
+        self._running_seconds += lapse.get_seconds()
+
+    def _add_paused_lapse(self, lapse: Lapse):
+        self._paused_lapses.append(lapse)
+        self._paused_seconds += lapse.get_seconds()
+        if self._start_time and lapse.start > self._start_time:
+            self._paused_seconds_since_start += lapse.get_seconds()
+
+    def get_lapses(self) -> LapseStore:
+        """All the lapses recorded by this timer, ordered by start."""
+        store = LapseStore()
+        for row in sorted(
+            itertools.chain(self._running_lapses.rows(), self._paused_lapses.rows())
+        ):
+            store.append_row(*row)
+
+        return store
+
+    def get_current_elapsed_time(self, at: dt.datetime | None = None) -> int:
+        """Seconds elapsed since current start time - paused_time.
+
+        :param at: The instant to measure at. Current time if `None`.
+
+        """
+        now = at or _now()
+        paused_time = self._paused_seconds_since_start
         if self._pause_time:
             paused_time += int((now - self._pause_time).total_seconds())
 
@@ -86,24 +204,29 @@ class Timer:
 
         return 0
 
-    def get_current_paused_time(self) -> int:
+    def get_current_paused_time(self, at: dt.datetime | None = None) -> int:
         """Seconds this timer has been paused."""
         if self.paused and self._pause_time:
-            return int((_now() - self._pause_time).total_seconds())
+            return int(((at or _now()) - self._pause_time).total_seconds())
 
         return 0
 
-    def get_total_elapsed_time(self) -> int:
+    def get_seconds_to_next_second(self, at: dt.datetime | None = None) -> float:
+        """Seconds until the elapsed time counts one more second. Time doesn't
+        count while stopped or paused, so it's `inf` then."""
+        if not self.running or self._start_time is None:
+            return math.inf
+
+        elapsed = ((at or _now()) - self._start_time).total_seconds()
+        return 1 - elapsed % 1
+
+    def get_total_elapsed_time(self, at: dt.datetime | None = None) -> int:
         """Seconds in total this timer has been in running."""
-        return self.get_current_elapsed_time() + sum(
-            running_lapse.get_seconds() for running_lapse in self._running_lapses
-        )
+        return self.get_current_elapsed_time(at) + self._running_seconds
 
-    def get_total_paused_time(self) -> int:
+    def get_total_paused_time(self, at: dt.datetime | None = None) -> int:
         """Seconds in total this timer has been in running."""
-        return self.get_current_paused_time() + sum(
-            paused_lapse.get_seconds() for paused_lapse in self._paused_lapses
-        )
+        return self.get_current_paused_time(at) + self._paused_seconds
 
     def start(self) -> Lapse | None:
         """:return: A lapse, if one was created. `None` otherwise."""
@@ -112,6 +235,7 @@ class Timer:
 
         if not self.started:
             self._start_time = _now()
+            self._paused_seconds_since_start = 0
 
         new_lapse = None
         if self.paused and self._pause_time:
@@ -119,7 +243,7 @@ class Timer:
             new_lapse = Lapse(
                 start=self._pause_time, end=current_time, type=LapseType.rest
             )
-            self._paused_lapses.append(new_lapse)
+            self._add_paused_lapse(new_lapse)
             self._pause_time = None
 
         return new_lapse
@@ -134,10 +258,11 @@ class Timer:
                 end=_now(),
                 type=LapseType.rest if self.paused else LapseType.focus,
             )
-            self._running_lapses.append(new_lapse)
+            self._add_running_lapse(new_lapse)
             self.total_elapsed_time += self.get_elapsed_seconds()
             self._start_time = None
             self._pause_time = None
+            self._paused_seconds_since_start = 0
 
         return new_lapse
 
@@ -149,20 +274,14 @@ class Timer:
             return
 
         current_time = _now()
-        self._running_lapses.append(
+        self._add_running_lapse(
             Lapse(start=self._start_time, end=current_time, type=LapseType.pause)
         )
         self._pause_time = current_time
 
     def get_elapsed_seconds(self) -> int:
         """I return the total of elapsed seconds."""
-        return sum(
-            running_lapse.get_seconds() for running_lapse in self._running_lapses
-        ) - sum(
-            paused_lapse.get_seconds()
-            for paused_lapse in self._paused_lapses
-            if paused_lapse.start
-        )
+        return self._running_seconds - self._paused_seconds
 
     def get_total_elapsed_minutes_seconds(self) -> Duration:
         """I return the total of elapsed seconds for every time"""
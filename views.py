@@ -0,0 +1,97 @@
+"""View models between `Focus` and the toga widgets.
+
+Every assignment to a widget crosses into the native GUI backend, so I keep
+what was last rendered and only push what changed.
+
+"""
+
+import time
+from collections import deque
+from collections.abc import Callable
+
+from focus import TickSnapshot
+from timer import duration_from_seconds
+
+
+class UpdateCounter:
+    """I count the updates pushed to native widgets.
+
+    :ivar total: Updates since I was created.
+
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self.total = 0
+        self._clock = clock
+        self._times: deque[float] = deque()
+
+    def count(self):
+        self.total += 1
+        self._times.append(self._clock())
+
+    def per_minute(self) -> int:
+        """Updates in the last minute."""
+        start = self._clock() - 60
+        while self._times and self._times[0] <= start:
+            self._times.popleft()
+        return len(self._times)
+
+
+class LabelView:
+    """I stand in front of a label, and only update it when its text or color
+    change."""
+
+    def __init__(self, label, updates: UpdateCounter) -> None:
+        self.label = label
+        self._updates = updates
+        self._text: str = label.text
+        self._color: str | None = None
+
+    def render(self, text: str | None = None, color: str | None = None):
+        """Show `text` in `color`. `None` leaves either as is."""
+        if text is not None and text != self._text:
+            self.label.text = self._text = text
+            self._updates.count()
+
+        if color is not None and color != self._color:
+            self.label.style.color = self._color = color
+            self._updates.count()
+
+
+class TimerView:
+    """I render a `TickSnapshot` into the labels of the timer tab.
+
+    :ivar updates: Counts the updates pushed to the labels, for profiling.
+
+    """
+
+    def __init__(
+        self,
+        *,
+        timer_label,
+        total_focused_label,
+        total_rested_label,
+        earned_break_label,
+        updates: UpdateCounter | None = None,
+    ) -> None:
+        self.updates = updates or UpdateCounter()
+        self.timer = LabelView(timer_label, self.updates)
+        self.total_focused = LabelView(total_focused_label, self.updates)
+        self.total_rested = LabelView(total_rested_label, self.updates)
+        self.earned_break = LabelView(earned_break_label, self.updates)
+
+    def render(self, snapshot: TickSnapshot):
+        self.timer.render(
+            str(duration_from_seconds(snapshot.clock)),
+            color="red" if snapshot.break_exhausted and snapshot.resting else "black",
+        )
+        self.earned_break.render(
+            f"Earned break time: {snapshot.earned_break_time // 60} minutes"
+        )
+        self.total_focused.render(
+            f"Total focused time: {duration_from_seconds(snapshot.total_focused)}"
+        )
+        self.total_rested.render(
+            f"Total break time: {duration_from_seconds(snapshot.total_rested)}",
+            color="red" if snapshot.break_exhausted else "black",
+        )
@@ -0,0 +1,238 @@
+"""Persistence off the UI thread."""
+
+import logging
+import threading
+import time
+from collections.abc import Callable, Hashable
+from concurrent.futures import Future
+from typing import Any
+
+from signals import write_failed
+
+logger = logging.getLogger(__name__)
+
+Command = Callable[[], None]
+
+
+class _Call:
+    """A command whose caller waits for its result in `future`."""
+
+    def __init__(self, command: Callable[[], Any]):
+        self.command = command
+        self.future: Future = Future()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+    def __call__(self):
+        self.result = self.command()
+
+
+def _run_batch(batch: dict[Hashable, Command]) -> dict[Hashable, Command]:
+    """Run `batch` in a single `UnitOfWork`. If that fails, run each command in
+    one of its own, so a failing command doesn't take the others with it.
+
+    :return: The commands that failed, by key.
+
+    """
+    from db import UnitOfWork  # Imported late, it brings in SQLAlchemy.
+
+    try:
+        with UnitOfWork():
+            for command in batch.values():
+                command()
+    except Exception as error:
+        if len(batch) == 1:
+            logger.exception("Could not write a command")
+            for command in batch.values():
+                if isinstance(command, _Call):
+                    command.error = error
+            return dict(batch)
+    else:
+        return {}
+
+    failed: dict[Hashable, Command] = {}
+    for key, command in batch.items():
+        failed |= _run_batch({key: command})
+    return failed
+
+
+def _write(batch: dict[Hashable, Command]) -> dict[Hashable, Command]:
+    """Run `batch` and hand calls their results.
+
+    :return: The commands to hold, by key. Calls that fail aren't held, their
+        callers get the error.
+
+    """
+    failed = _run_batch(batch)
+    for key, command in batch.items():
+        if not isinstance(command, _Call):
+            continue
+        if key in failed:
+            command.future.set_exception(command.error)
+            del failed[key]
+        else:
+            command.future.set_result(command.result)
+
+    return failed
+
+
+def _merge(
+    held: dict[Hashable, Command], pending: dict[Hashable, Command]
+) -> dict[Hashable, Command]:
+    """The `held` commands not replaced by a `pending` one, then `pending`."""
+    merged = {key: command for key, command in held.items() if key not in pending}
+    merged.update(pending)
+    return merged
+
+
+class BackgroundWriter:
+    """I run persistence commands on a thread of my own.
+
+    Commands submitted with the same key are coalesced: if an earlier one is
+    still waiting, only the latest runs. Waiting commands run in batches, each
+    batch inside a single `UnitOfWork`.
+
+    Commands that fail are held, and tried again with the next batch, on
+    `flush` and on `close`, unless a later command with the same key replaces
+    them. `signals.write_failed` is sent with the number of commands held.
+    Commands queued with `call` aren't held: their callers get the error.
+
+    :ivar batch_delay: Seconds to wait for more commands before writing.
+
+    """
+
+    def __init__(self, batch_delay: float = 0.05):
+        self.batch_delay = batch_delay
+
+        self._pending: dict[Hashable, Command] = {}
+        self._held: dict[Hashable, Command] = {}
+        self._busy = False
+        self._closed = False
+        self._condition = threading.Condition()
+
+        self._thread = threading.Thread(
+            target=self._run, name="focus-writer", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, command: Command, key: Hashable | None = None):
+        """Queue `command`, replacing the waiting one with the same `key`."""
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("The writer is closed.")  # noqa: TRY003  Misuse.
+
+            if key is None:
+                key = object()
+            self._pending.pop(key, None)
+            self._pending[key] = command
+            self._condition.notify_all()
+
+    def call[T](self, command: Callable[[], T]) -> Future[T]:
+        """Queue `command` with the others, to be written in the next batch.
+
+        :return: A future with the result of `command`, or its error, set once
+            its batch is written.
+
+        """
+        call = _Call(command)
+        self.submit(call)
+        return call.future
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Wait until every submitted command, and every held one, has run.
+
+        :return: `False` if `timeout` expired first, or some still fail.
+
+        """
+        with self._condition:
+            self._retry_held()
+            done = self._condition.wait_for(
+                lambda: not self._pending and not self._busy, timeout
+            )
+            return done and not self._held
+
+    def close(self, timeout: float | None = None):
+        """Write what's pending, try the held commands once more, and stop
+        the thread. Commands that still fail are dropped."""
+        with self._condition:
+            self._retry_held()
+            self._closed = True
+            self._condition.notify_all()
+
+        self._thread.join(timeout)
+
+    def _retry_held(self):
+        if self._held:
+            self._pending = _merge(self._held, self._pending)
+            self._held = {}
+            self._condition.notify_all()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._closed)
+                if not self._pending:
+                    if self._held:
+                        logger.error(
+                            "Dropped %d commands that could not be written",
+                            len(self._held),
+                        )
+                    return
+
+            if not self._closed:
+                time.sleep(self.batch_delay)
+
+            with self._condition:
+                batch = _merge(self._held, self._pending)
+                self._pending, self._held = {}, {}
+                self._busy = True
+
+            failed: dict[Hashable, Command] = {}
+            try:
+                failed = _write(batch)
+            finally:
+                with self._condition:
+                    self._held = {
+                        key: command
+                        for key, command in failed.items()
+                        if key not in self._pending
+                    }
+                    self._busy = False
+                    self._condition.notify_all()
+
+            if failed:
+                write_failed.send(self, count=len(failed))
+
+
+class SynchronousWriter:
+    """I run each command as soon as it's submitted, like `BackgroundWriter`
+    would in a batch of its own. For tests and scripts."""
+
+    def __init__(self):
+        self._held: dict[Hashable, Command] = {}
+
+    def submit(self, command: Command, key: Hashable | None = None):
+        if key is None:
+            key = object()
+        self._write(_merge(self._held, {key: command}))
+
+    def call[T](self, command: Callable[[], T]) -> Future[T]:
+        call = _Call(command)
+        self.submit(call)
+        return call.future
+
+    def flush(self, timeout: float | None = None) -> bool:
+        if self._held:
+            self._write(self._held)
+        return not self._held
+
+    def close(self, timeout: float | None = None):
+        if not self.flush():
+            logger.error(
+                "Dropped %d commands that could not be written", len(self._held)
+            )
+
+    def _write(self, batch: dict[Hashable, Command]):
+        self._held = _write(batch)
+        if self._held:
+            write_failed.send(self, count=len(self._held))